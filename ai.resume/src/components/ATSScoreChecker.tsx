@@ -47,6 +47,8 @@ interface ScoreData {
   atsId: number;
 }
 
+const ATS_JOB_TIMEOUT_MS = 330_000;
+
 const RESUME_TEMPLATES = [];
 
 interface Template {
@@ -76,6 +78,19 @@ export function ATSScoreChecker() {
     }
   };
 
+  // ATS analysis runs as a background job; poll until it finishes
+  const waitForAtsJob = async (jobId: string) => {
+    // A little longer than the backend job lease (JOB_LEASE_SECONDS), after which the job is failed anyway
+    const deadline = Date.now() + ATS_JOB_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      const res = await api.get(`/ats/jobs/${jobId}`);
+      if (res.data.status === "done") return res.data.result;
+      if (res.data.status === "failed") throw new Error(res.data.error || "ATS analysis failed");
+    }
+    throw new Error("ATS analysis timed out");
+  };
+
   const analyzeResume = async () => {
     if (!uploadedFile) {
       toast.error('Please upload a resume first');
@@ -98,27 +113,29 @@ export function ATSScoreChecker() {
       const res = await api.post("/ats/check", formData, {
         headers: { "Content-Type": "multipart/form-data" },
       });
-      const raw = res.data.analysis;
+      // Local scores come back immediately; show them while the AI suggestions are generated
+      const preview = res.data.preview;
+      if (preview) {
+        setScoreData({
+          overall: preview.overall || 0,
+          breakdown: preview.breakdown || {},
+          missingData: preview.missing_data || [],
+          suggestions: [],
+          improvedResume: '',
+          atsId: 0,
+        } as ScoreData);
+      }
+      const result = await waitForAtsJob(res.data.job_id);
+      const raw = result.analysis;
       // 🧠 Normalize backend response
       const normalized = {
         overall: raw.overall || 0,
-        breakdown:
-          Array.isArray(raw.breakdown) && raw.breakdown.length > 0
-            ? raw.breakdown[0]
-            : {},
-        missingData:
-          Array.isArray(raw.missing_data) && raw.missing_data.length > 0
-            ? raw.missing_data[0]
-            : [],
-        suggestions:
-          Array.isArray(raw.suggestions) && raw.suggestions.length > 0
-            ? raw.suggestions[0]
-            : [],
-        improvedResume:
-          Array.isArray(raw.improvedResume) && raw.improvedResume.length > 0
-            ? raw.improvedResume[0]
-            : {},
-        atsId: res.data.ats_id || null,
+        breakdown: raw.breakdown || {},
+        missingData: raw.missing_data || [],
+        suggestions: raw.suggestions || [],
+        // Results saved before the fix hold the resume wrapped in a one-item list (kept as-is on a fallback)
+        improvedResume: Array.isArray(raw.improvedResume) ? raw.improvedResume[0] || {} : raw.improvedResume || {},
+        atsId: result.ats_id || null,
       };
       setScoreData(normalized);
       toast.success("Analysis complete!");
@@ -0,0 +1,36 @@
+-- Tables for the background job queue (JOB_BACKEND=sql) and the persistent
+-- LLM response cache (LLM_CACHE_PERSIST=true). Safe to run more than once:
+--
+--   mysql -u $MYSQL_USER -p careerboost < db/migrations/001_background_jobs_and_llm_response_cache.sql
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id VARCHAR(36) NOT NULL,
+    user_id INT NULL,
+    job_type VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    dedupe_key VARCHAR(128) NULL,
+    payload JSON NULL,
+    result JSON NULL,
+    error TEXT NULL,
+    created_at DATETIME NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME NULL,
+    finished_at DATETIME NULL,
+    PRIMARY KEY (id),
+    KEY ix_background_jobs_user_id (user_id),
+    KEY ix_background_jobs_status (status),
+    KEY ix_background_jobs_dedupe_key (dedupe_key),
+    CONSTRAINT fk_background_jobs_user_id FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    id INT NOT NULL AUTO_INCREMENT,
+    cache_key VARCHAR(64) NOT NULL,
+    model_name VARCHAR(100) NOT NULL,
+    endpoint VARCHAR(64) NULL,
+    response MEDIUMTEXT NOT NULL,
+    created_at DATETIME NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY ix_llm_response_cache_cache_key (cache_key),
+    KEY ix_llm_response_cache_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
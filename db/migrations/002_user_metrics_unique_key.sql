@@ -0,0 +1,28 @@
+-- One user_metrics row per (user_id, feature_name): the key the counter upsert
+-- conflicts on. Without it ON DUPLICATE KEY UPDATE never fires and every
+-- increment inserts another row. Existing duplicates are folded into the oldest
+-- row first (counts summed), otherwise the unique key cannot be added.
+--
+--   mysql -u $MYSQL_USER -p careerboost < db/migrations/002_user_metrics_unique_key.sql
+--
+-- Run it while the API is stopped: a counter written between the DELETE and the
+-- ALTER can create a new duplicate and make the ALTER fail (rerunning fixes it).
+
+START TRANSACTION;
+
+UPDATE user_metrics m
+JOIN (
+    SELECT user_id, feature_name, MIN(id) AS keep_id, SUM(count) AS total, MAX(updated_at) AS last_updated
+    FROM user_metrics
+    GROUP BY user_id, feature_name
+    HAVING COUNT(*) > 1
+) d ON m.id = d.keep_id
+SET m.count = d.total, m.updated_at = COALESCE(d.last_updated, m.updated_at);
+
+DELETE m FROM user_metrics m
+JOIN user_metrics keep
+  ON keep.user_id = m.user_id AND keep.feature_name = m.feature_name AND keep.id < m.id;
+
+COMMIT;
+
+ALTER TABLE user_metrics ADD UNIQUE KEY uq_user_metrics_user_feature (user_id, feature_name);
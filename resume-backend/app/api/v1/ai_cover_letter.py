@@ -1,18 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Response, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
 import os
-from app.core.security import get_current_user  # optional if user-specific
+from app.core.security import get_current_user_async  # optional if user-specific
 from app.core.config import settings
-from jinja2 import Environment, FileSystemLoader
-from app.utils.activity_tracker import track_activity, log_user_activity
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.utils.pdf_generator import generate_pdf_from_html
-
-genai.configure(api_key=settings.GEMINI_API_KEY)
-TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "../../templates/cover-letter")
-env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+from app.utils.activity_tracker import track_activity_async, log_user_activity
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.utils.sse import sse_event, SSE_HEADERS
+from app.utils.pdf_pool import render_pdf
+from app.core import llm_gateway
+from app.utils.template_registry import jinja_env
+from app.utils.http_cache import file_response
 
 router = APIRouter()
 class CoverLetterRequest(BaseModel):
@@ -21,50 +21,53 @@ class CoverLetterRequest(BaseModel):
     jobDescription: str | None = None
     tone: str | None = "professional"
 
+def build_cover_letter_prompt(request: CoverLetterRequest) -> str:
+    prompt = f"""
+        Write a personalized and well-structured cover letter.
+
+        Details:
+        - Job Role: {request.jobRole}
+        - Company: {request.companyName}
+        - Job Description: {request.jobDescription or "Not provided"}
+        - Desired Tone: {request.tone or "professional"}
+
+        Guidelines:
+        - Use a {request.tone or "professional"} tone throughout.
+        - Make it concise but engaging.
+        - Highlight relevant skills naturally.
+        - Sign with "Sincerely, [Candidate Name]".
+        """
+    return prompt
+
+
 @router.post("/ai/cover-letter")
-def generate_cover_letter(request: CoverLetterRequest, current_user=Depends(get_current_user),db: Session = Depends(get_db)):
+async def generate_cover_letter(request: CoverLetterRequest, current_user=Depends(get_current_user_async),db: AsyncSession = Depends(get_async_db)):
     """
     Generate a personalized cover letter using Gemini AI.
     """
 
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
+        prompt = build_cover_letter_prompt(request)
 
-        prompt = f"""
-            Write a personalized and well-structured cover letter.
+        text = await llm_gateway.generate(prompt, endpoint="cover_letter", user_id=current_user.id)
 
-            Details:
-            - Job Role: {request.jobRole}
-            - Company: {request.companyName}
-            - Job Description: {request.jobDescription or "Not provided"}
-            - Desired Tone: {request.tone or "professional"}
-
-            Guidelines:
-            - Use a {request.tone or "professional"} tone throughout.
-            - Make it concise but engaging.
-            - Highlight relevant skills naturally.
-            - Sign with "Sincerely, [Candidate Name]".
-            """
-
-        result = model.generate_content(prompt)
-
-        if not result.text:
+        if not text:
             raise HTTPException(status_code=500, detail="Failed to generate content.")
 
-        text = result.text.strip()
-        text = text.replace("```json", "").replace("```", "")
+        text = llm_gateway.clean_json_text(text)
 
         from app.utils.ai_logger import save_ai_interaction
         ai_response = f"{text}"
         # Save the interaction
-        save_ai_interaction(
+        await asyncio.to_thread(
+            save_ai_interaction,
             user=current_user,
             prompt=prompt,
             response=ai_response,
             requirement_type='cover_letter',
-            model_name="gemini-2.5-flash"
+            model_name=llm_gateway.DEFAULT_MODEL
         )
-        track_activity(db, current_user.id, "ai_cover_letter_generate")
+        await track_activity_async(db, current_user.id, "ai_cover_letter_generate")
         log_user_activity(
             db=db, 
             user_id=current_user.id, 
@@ -73,10 +76,59 @@ def generate_cover_letter(request: CoverLetterRequest, current_user=Depends(get_
         )
         return {"cover_letter": text}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/ai/cover-letter/stream")
+async def generate_cover_letter_stream(request: CoverLetterRequest, current_user=Depends(get_current_user_async)):
+    """
+    Streaming variant of /ai/cover-letter.
+    Forwards Gemini tokens as "token" events, then sends a "done" event with the full letter.
+    """
+    prompt = build_cover_letter_prompt(request)
+
+    async def event_stream():
+        parts = []
+        try:
+            async for chunk in llm_gateway.stream(prompt, endpoint="cover_letter"):
+                parts.append(chunk)
+                yield sse_event({"text": chunk}, event="token")
+        except Exception as e:
+            yield sse_event({"detail": str(e)}, event="error")
+            return
+
+        text = llm_gateway.clean_json_text("".join(parts))
+        if not text:
+            yield sse_event({"detail": "Failed to generate content."}, event="error")
+            return
+        yield sse_event({"cover_letter": text}, event="done")
+
+        from app.utils.ai_logger import save_ai_interaction
+        await asyncio.to_thread(
+            save_ai_interaction,
+            user=current_user,
+            prompt=prompt,
+            response=text,
+            requirement_type='cover_letter',
+            model_name=llm_gateway.DEFAULT_MODEL
+        )
+        # The request session is already closed once streaming starts
+        async with AsyncSessionLocal() as db:
+            await track_activity_async(db, current_user.id, "ai_cover_letter_generate")
+            log_user_activity(
+                db=db, 
+                user_id=current_user.id, 
+                action="ai_cover_letter_generate", 
+                meta_data={"fields": 'changed_fields'}
+            )
+            await db.commit()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 class CoverLetterPdfRequest(BaseModel):
     coverLetter: str
     jobRole: str
@@ -85,7 +137,7 @@ class CoverLetterPdfRequest(BaseModel):
     tone: str | None = "professional"
    
 @router.post("/ai/cover-letter/pdf")
-def generate_cover_letter_pdf(request: CoverLetterPdfRequest, current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+async def generate_cover_letter_pdf(request: CoverLetterPdfRequest, http_request: Request, current_user=Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
     # Render HTML for PDF
     """
     Generate a downloadable PDF for the cover letter.
@@ -93,7 +145,7 @@ def generate_cover_letter_pdf(request: CoverLetterPdfRequest, current_user=Depen
     try:
        
         # Render HTML for PDF
-        template = env.get_template("cover_letter_template.html")
+        template = jinja_env.get_template("cover-letter/cover_letter_template.html")
         html_content = template.render(
             jobRole=request.jobRole,
             companyName=request.companyName,
@@ -103,24 +155,27 @@ def generate_cover_letter_pdf(request: CoverLetterPdfRequest, current_user=Depen
             candidate_name=current_user.full_name if hasattr(current_user, "full_name") else "John Doe"
         )
 
-        # Generate PDF
-        pdf_bytes = generate_pdf_from_html(html_content)
+        # Generate PDF in the render pool
+        pdf_bytes = await render_pdf(html_content, label="cover_letter")
 
-        track_activity(db, current_user.id, "cover_letter_download")
+        await track_activity_async(db, current_user.id, "cover_letter_download")
         log_user_activity(
             db=db, 
             user_id=current_user.id, 
             action="cover_letter_download", 
             meta_data={"fields": 'changed_fields'}
         )
-        # Return file download
-        return Response(
-            content=pdf_bytes,
+        # Return file download (streamed; a POST gets no ETag, nothing would revalidate it)
+        return file_response(
+            http_request,
+            pdf_bytes,
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="CoverLetter_{request.jobRole}.pdf"'
             },
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,82 +1,60 @@
 # app/api/v1/ats.py
+import asyncio
+import hashlib
 import os
-import io
 import json
-import fitz  # PyMuPDF
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from weasyprint import HTML
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from app.models.resume import Resume
 from app.utils.change_ditect import get_changed_fields
-from app.utils.activity_tracker import track_activity, log_user_activity
+from app.utils.activity_tracker import track_activity_async, log_user_activity
+from app.core import llm_gateway
+from app.utils.single_flight import SingleFlight, make_flight_key
+from app.utils.ats_scorer import score_resume_text
+from app.utils import pdf_cache
+from app.utils.document_extractor import extract_upload, truncate_pages
+from app.utils.resume_sections import compact_resume_text, fill_contact, has_sections, parse_sections
+from app.jobs.queue import get_backend
+from app.jobs.worker import register_job, submit_job
 
-import google.generativeai as genai
-
-from app.core.database import get_db
-from app.core.security import get_current_user  # your function
+from app.core.database import AsyncSessionLocal
+from app.core.security import get_current_user_async  # your function
 from app.models.ats import ATSResult
+from app.models.user import User
 from app.core.config import settings
 
 router = APIRouter()
 
-# configure gemini API key
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Double-clicks / client retries of the same upload share one analysis + DB write
+ats_flight = SingleFlight()
 
-# Dir for resume HTML templates
-TEMPLATES_DIR = "./templates/resume_templates"
 # Dir to store generated PDFs (optional)
 OUTPUT_PDF_DIR = "./generated_pdfs"
 os.makedirs(OUTPUT_PDF_DIR, exist_ok=True)
 
-jinja_env = Environment(
-    loader=FileSystemLoader(TEMPLATES_DIR),
-    autoescape=select_autoescape(["html", "xml"]),
-)
-
-def extract_text_from_upload(file: UploadFile) -> str:
-    """Extract text using fitz/PyMuPDF for PDF; for docx fallback to python-docx if needed."""
-    try:
-        content = file.file.read()
-        if file.content_type == "application/pdf" or file.filename.lower().endswith(".pdf"):
-            doc = fitz.open(stream=content, filetype="pdf")
-            pages = []
-            for p in doc:
-                text = p.get_text("text") or ""
-                pages.append(text)
-            return "\n".join(pages).strip()
-        # if docx
-        if file.content_type in (
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/msword",
-        ) or file.filename.lower().endswith((".doc", ".docx")):
-            # light-weight fallback using python-docx
-            try:
-                from docx import Document
-                doc = Document(io.BytesIO(content))
-                return "\n".join([p.text for p in doc.paragraphs]).strip()
-            except Exception:
-                raise HTTPException(status_code=400, detail="Unable to extract text from DOC/DOCX")
-        # else treat as plain text
-        return content.decode("utf-8", errors="ignore").strip()
-    finally:
-        # ensure file pointer reset/closed
-        try:
-            file.file.close()
-        except Exception:
-            pass
-
-def call_gemini_analyze(resume_text: str, current_user):
+async def call_gemini_analyze(resume_text: str, current_user, document_sha256: str | None = None, local_contact: dict | None = None):
     """
     Call Gemini with a strict JSON return instruction.
     Parse and return a dict.
+    With the uploaded file's hash, the response cache is keyed on the file plus
+    a hash of the prompt around the resume text (instructions, today's date,
+    contact note), so editing the prompt never serves responses to the old one.
+    `local_contact` lists contact fields parsed locally (and left out of resume_text).
     """
     today_date = datetime.now().strftime("%B %d, %Y")
+    contact_note = ""
+    if local_contact:
+        contact_note = (
+            f"The resume is split into sections; {', '.join(local_contact)} were extracted separately "
+            "and are not included. Return those fields as empty strings."
+        )
     prompt = f"""You are an advanced Applicant Tracking System (ATS) evaluator and resume optimizer.
 
-    Analyze the following resume text and return an objective, machine-readable evaluation and a reconstructed improved resume.
+    Analyze the following resume text and return machine-readable improvement feedback and a reconstructed improved resume.
+    The numeric ATS scores are computed separately, do not return them.
 
     Follow these precise instructions:
 
@@ -90,10 +68,6 @@ def call_gemini_analyze(resume_text: str, current_user):
 
     ### OUTPUT FORMAT
     Return a **single JSON object** with exactly these top-level keys:
-    - "overall": integer (0–100) — total ATS compatibility score.
-    - "breakdown": object with keys:
-        - "formatting", "keywords", "experience", "education", "skills", "contact"
-        - Each key’s value must be an integer (0–100).
     - "missingData": array of objects:
     - Each object must include:
         - "category": string (e.g. "Skills", "Experience", "Formatting")
@@ -105,15 +79,6 @@ def call_gemini_analyze(resume_text: str, current_user):
     - all the discriptions should be concise and to the point, avoiding unnecessary elaboration."
     - keywords need to be specific to the job role and industry, and no need to include what have in skills section."
     ```json{{
-        "overall": 0-100,
-        "breakdown": {{
-            "formatting": 0-100,
-            "keywords": 0-100,
-            "experience": 0-100,
-            "education": 0-100,
-            "skills": 0-100,
-            "contact": 0-100
-        }},
         "missingData": [
             {{
             "category": "string",
@@ -180,71 +145,151 @@ def call_gemini_analyze(resume_text: str, current_user):
             "keywords": ["string", "..."]
         }}
     }}
+    {contact_note}
     Resume:
     {resume_text}
     """
 
-    model = genai.GenerativeModel("gemini-2.5-flash")  # pick model you have access to
-    resp = model.generate_content(prompt)
-    text = resp.text.strip()
-    text = text.replace("```json", "").replace("```", "")
-    try:
-        data = json.loads(text)
-    except Exception as e:
-        # include raw text in exception so debugging easier
-        raise ValueError(f"Failed to parse Gemini JSON. error={e}; raw_output={text[:1000]}")
-    
+    cache_key = None
+    if document_sha256:
+        instructions = prompt.replace(resume_text, "")
+        cache_key = f"{document_sha256}:{hashlib.sha256(instructions.encode('utf-8')).hexdigest()[:16]}"
+    data, text = await llm_gateway.generate_json(
+        prompt, endpoint="ats_check", cache=True, user_id=current_user.id, cache_key=cache_key,
+    )
+
     from app.utils.ai_logger import save_ai_interaction
     ai_response = f"{text}"
     # Save the interaction
-    save_ai_interaction(
+    await asyncio.to_thread(
+        save_ai_interaction,
         user=current_user,
         prompt=prompt,
         response=ai_response,
         requirement_type='ats_check',
-        model_name="gemini-2.5-flash"
+        model_name=llm_gateway.DEFAULT_MODEL
     )
     return data
 
-@router.post("/ats/check")
-async def ats_check(file: UploadFile = File(...), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+@router.post("/ats/check", status_code=202)
+async def ats_check(file: UploadFile = File(...), current_user=Depends(get_current_user_async)):
     """
-    Upload resume file -> run Gemini ATS analysis -> store ATSResult -> return JSON with result and id.
+    Upload resume file -> extract text -> queue the Gemini ATS analysis.
+    Returns a job id right away; poll GET /ats/jobs/{job_id} for the result.
     """
     # 1) extract text
-    resume_text = extract_text_from_upload(file)
+    document = await extract_upload(file)
+    resume_text = truncate_pages(document, settings.DOCUMENT_PROMPT_MAX_CHARS)
     if not resume_text:
         raise HTTPException(status_code=400, detail="Could not extract any text from uploaded file")
+    # Compact sections + locally parsed contact for the prompt; None if the layout wasn't recognised
+    parsed = parse_sections(document)
+    if not has_sections(parsed):
+        parsed = None
+
+    # Local scores are instant; Gemini only fills in suggestions + improved resume
+    local_scores = score_resume_text(resume_text)
 
-    # 2) call Gemini
+    job_id = await submit_job(
+        "ats_check",
+        current_user.id,
+        {"resume_text": resume_text, "document_sha256": document["sha256"], "parsed": parsed},
+        dedupe_key=make_flight_key(current_user.id, resume_text),
+    )
+    return {
+        "status": "queued",
+        "job_id": job_id,
+        "preview": {
+            "overall": local_scores["overall"],
+            "breakdown": local_scores["breakdown"],
+            "missing_data": local_scores["missingData"],
+        },
+    }
+
+
+@router.get("/ats/jobs/{job_id}")
+async def ats_job_status(job_id: str, current_user=Depends(get_current_user_async)):
+    """
+    Status of a queued ATS check: queued, running, done or failed.
+    When done, "result" holds the same body /ats/check used to return.
+    """
+    job = await asyncio.to_thread(get_backend().get, job_id)
+    if not job or job["user_id"] != current_user.id or job["job_type"] != "ats_check":
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+@register_job("ats_check")
+async def run_ats_check_job(job: dict) -> dict:
+    resume_text = job["payload"]["resume_text"]
+    document_sha256 = job["payload"].get("document_sha256")
+    parsed = job["payload"].get("parsed")
+    # Jobs run on the API process's event loop, so the DB work is awaited like in the routes
+    async with AsyncSessionLocal() as db:
+        current_user = await db.get(User, job["user_id"])
+        if not current_user:
+            raise ValueError("User no longer exists")
+        key = make_flight_key(current_user.id, resume_text)
+        return await ats_flight.run(key, analyze_and_store, resume_text, db, current_user, document_sha256, parsed)
+
+
+async def analyze_and_store(resume_text: str, db: AsyncSession, current_user, document_sha256: str | None = None, parsed: dict | None = None):
+    """
+    Score extracted resume text locally, ask Gemini for suggestions and an
+    improved resume, and persist both to ATSResult and Resume.
+    If Gemini fails, the local scores are still saved and returned with
+    "fallback": true, and the user's resume is left untouched.
+    With `parsed` sections (resume_sections.parse_sections), Gemini gets the
+    compact sections instead of the raw text and contact fields are filled locally.
+    Returns the /ats/check response body.
+    """
+    # 2) deterministic scores
+    local_scores = score_resume_text(resume_text)
+    overall = local_scores["overall"]
+    breakdown = local_scores["breakdown"]
+
+    # 3) call Gemini for the qualitative part
+    fallback = False
     try:
-        analysis = call_gemini_analyze(resume_text, current_user)
+        if parsed:
+            prompt_text = compact_resume_text(parsed, settings.DOCUMENT_PROMPT_MAX_CHARS) or resume_text
+            analysis = await call_gemini_analyze(prompt_text, current_user, document_sha256, parsed["contact"])
+        else:
+            analysis = await call_gemini_analyze(resume_text, current_user, document_sha256)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI analysis failed: {e}")
+        print(f"⚠ ATS Gemini analysis failed, returning local scores only: {e}")
+        analysis = {}
+        fallback = True
 
-    # 3) normalize expected fields
-    overall = analysis.get("overall")
-    breakdown = analysis.get("breakdown")
-    missing_data = analysis.get("missingData") or analysis.get("missing_data") or []
-    suggestions = analysis.get("suggestions") or []
+    missing_data = analysis.get("missingData") or analysis.get("missing_data") or local_scores["missingData"]
+    suggestions = analysis.get("suggestions") or [
+        item for group in local_scores["missingData"] for item in group["items"]
+    ]
     improved_resume = analysis.get("improvedResume") or analysis.get("improved_resume") or ""
+    if parsed and isinstance(improved_resume, dict):
+        fill_contact(improved_resume, parsed["contact"])
 
-    ats = db.query(ATSResult).filter(ATSResult.user_id == current_user.id).first()
+    ats = await db.scalar(select(ATSResult).where(ATSResult.user_id == current_user.id))
     if not ats:
         ats = ATSResult(user_id=current_user.id)
         db.add(ats)
         
     # 4) persist to DB
-    ats.user_id=current_user.id,
-    ats.overall=int(overall) if overall is not None else None,
-    ats.breakdown=breakdown,
-    ats.missing_data=missing_data,
-    ats.suggestions=suggestions,
-    ats.improved_resume=improved_resume,
-
-    db.commit()
-    db.refresh(ats)
+    ats.user_id = current_user.id
+    ats.overall = int(overall) if overall is not None else None
+    ats.breakdown = breakdown
+    ats.missing_data = missing_data
+    ats.suggestions = suggestions
+    if not fallback:
+        ats.improved_resume = improved_resume
 
+    # Everything below is staged and committed once at the end (one transaction, no refreshes)
     changed_fields = get_changed_fields(ats)
     if changed_fields:
         log_user_activity(
@@ -254,31 +299,33 @@ async def ats_check(file: UploadFile = File(...), db: Session = Depends(get_db),
             meta_data={"fields": changed_fields}
         )
 
-    # Save to resume also
-    resume = db.query(Resume).filter(Resume.user_id == current_user.id).first()
-    if not resume:
-        resume = Resume(user_id=current_user.id)
-        db.add(resume)
+    await track_activity_async(db, current_user.id, "ats_using")
 
-    # Save entire JSON to single JSON column
-    resume.resume_data = improved_resume  # assuming resume_data is a JSON column
-    db.commit()
-    db.refresh(resume)
+    if not fallback:
+        # Save to resume also
+        resume = await db.scalar(select(Resume).where(Resume.user_id == current_user.id))
+        if not resume:
+            resume = Resume(user_id=current_user.id)
+            db.add(resume)
 
-    track_activity(db, current_user.id, "ats_using")
+        # Save entire JSON to single JSON column
+        resume.resume_data = improved_resume  # assuming resume_data is a JSON column
 
-    changed_fields = get_changed_fields(resume)
-    if changed_fields:
-        log_user_activity(
-            db=db, 
-            user_id=current_user.id, 
-            action="resume_update", 
-            meta_data={"fields": changed_fields}
-        )
+        changed_fields = get_changed_fields(resume)
+        if changed_fields:
+            log_user_activity(
+                db=db, 
+                user_id=current_user.id, 
+                action="resume_update", 
+                meta_data={"fields": changed_fields}
+            )
 
-    return {
+    await db.flush()  # assigns ats.id for a new result
+
+    result = {
         "status": "success", 
-        "ats_id": ats.id, 
+        "fallback": fallback,
+        "ats_id": ats.id,
         "analysis": {
             "overall": ats.overall,
             "breakdown": ats.breakdown,
@@ -286,4 +333,8 @@ async def ats_check(file: UploadFile = File(...), db: Session = Depends(get_db),
             "suggestions": ats.suggestions,
             "improvedResume":ats.improved_resume,
         }
-    }
\ No newline at end of file
+    }
+    await db.commit()
+    if not fallback:
+        await pdf_cache.invalidate_user_async(current_user.id)
+    return result
\ No newline at end of file
@@ -31,8 +31,7 @@ def signup(user_data: UserCreate, background_tasks: BackgroundTasks, db: Session
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    db.flush()  # assigns new_user.id; committed by get_db
 
     token = create_access_token({"sub": new_user.email})
 
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, engine, async_engine
 from sqlalchemy import text
+from app.core import db_metrics, llm_cache
+from app.utils import activity_sink, document_extractor, pdf_cache, pdf_pool
 
 
 router = APIRouter()
@@ -20,3 +22,45 @@ def health_check(db: Session = Depends(get_db)):
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         return {"status": "error", "database": str(e)}
+
+@router.get("/health/db")
+def db_stats():
+    """
+    Connection pool state, checkout wait times and query counts per route (for this worker).
+    """
+    return db_metrics.get_stats({"sync": engine, "async": async_engine.sync_engine})
+
+@router.get("/health/llm-cache")
+def llm_cache_stats():
+    """
+    LLM response cache hit/miss counters per endpoint (for this worker).
+    """
+    return llm_cache.get_stats()
+
+@router.get("/health/pdf-cache")
+def pdf_cache_stats():
+    """
+    Rendered PDF cache hit/miss counters (for this worker).
+    """
+    return pdf_cache.get_stats()
+
+@router.get("/health/document-cache")
+def document_cache_stats():
+    """
+    Upload extraction cache hit/miss counters (for this worker).
+    """
+    return document_extractor.get_cache_stats()
+
+@router.get("/health/pdf-render")
+def pdf_render_stats():
+    """
+    Per-template PDF render time and output size (for this worker).
+    """
+    return pdf_pool.get_render_stats()
+
+@router.get("/health/activity-sink")
+def activity_sink_stats():
+    """
+    Write-behind activity log: queued, written, spilled and dropped events (for this worker).
+    """
+    return activity_sink.get_stats()
@@ -1,94 +1,108 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, AsyncSessionLocal
 from app.models import Resume, JobFitAnalysis
-from app.core.security import get_current_user
-import google.generativeai as genai
-import fitz  # PyMuPDF for PDFs
-import docx
+from app.core.security import get_current_user_async
+from app.core import llm_gateway
 import json
 import re
 from app.core.config import settings
-from app.utils.activity_tracker import track_activity
+from app.utils.activity_tracker import track_activity_async
 from app.utils.activity_tracker import log_user_activity
+from app.utils.skill_matcher import match_skills
+from app.utils.job_ranker import rank_job_descriptions
+from app.utils.document_extractor import extract_upload, truncate_pages
+import asyncio
 
 router = APIRouter()
 
-# 🔑 Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Weights folding the score breakdown into match_score
+JOB_FIT_WEIGHTS = {
+    "required_skills_match": 0.4,
+    "experience_level_match": 0.3,
+    "education_requirements_match": 0.15,
+    "preferred_qualifications_match": 0.15,
+}
 
 
 # --- Utility functions ---
-def extract_text_from_pdf(file: UploadFile) -> str:
-    """Extract readable text from a PDF file"""
-    try:
-        pdf_bytes = file.file.read()
-        pdf = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = ""
-        for page in pdf:
-            text += page.get_text("text")
-        pdf.close()
-        return text.strip()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to read PDF file: {str(e)}")
+async def read_upload_text(file: UploadFile) -> str:
+    """Text of an uploaded PDF/DOCX job description, cut to the prompt budget at a page boundary"""
+    document = await extract_upload(file, kinds=("pdf", "docx"))
+    return truncate_pages(document, settings.DOCUMENT_PROMPT_MAX_CHARS)
 
 
-def extract_text_from_docx(file: UploadFile) -> str:
-    """Extract readable text from a DOCX file"""
-    try:
-        doc = docx.Document(file.file)
-        text = "\n".join([p.text for p in doc.paragraphs])
-        return text.strip()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to read DOCX file: {str(e)}")
+async def read_job_description(job_description: str, file: UploadFile | None) -> str:
+    """Job description text from the uploaded file, or the pasted text"""
+    jd_text = job_description.strip()
+    if file:
+        jd_text = await read_upload_text(file)
+
+    if not jd_text or len(jd_text) < 50:
+        raise HTTPException(status_code=400, detail="Job description is too short or empty.")
+    return jd_text
 
 
-# --- Main Route ---
-@router.post("/job/analyze")
-async def analyze_job_description(job_description: str = Form(""),file: UploadFile = File(None),db: Session = Depends(get_db),current_user=Depends(get_current_user)):
-    """
-    Analyze a job description (uploaded file or pasted text)
-    against the user's resume using Google Gemini.
+def build_resume_summary(resume_data: dict) -> str:
+    """Short plain-text view of the stored resume JSON for the prompt"""
+    def join(items, fmt):
+        return ", ".join(fmt(i) for i in items or [] if isinstance(i, dict))
+
+    return f"""
+    Name: {resume_data.get("name", "")}
+    Role: {resume_data.get("jobrole", "")}
+    Summary: {resume_data.get("summary", "")}
+    Experience: {join(resume_data.get("experiences"), lambda e: f"{e.get('title', '')} at {e.get('company', '')} ({e.get('duration', '')})")}
+    Education: {join(resume_data.get("educations"), lambda e: f"{e.get('degree', '')} - {e.get('school', '')}")}
+    Projects: {join(resume_data.get("projects"), lambda p: p.get("name", ""))}
+    Certifications: {join(resume_data.get("certifications"), lambda c: c.get("name", ""))}
     """
 
-    # 🧩 Step 1: Load user's resume
-    resume = db.query(Resume).filter(Resume.user_id == current_user.id).first()
+
+async def read_job_descriptions(job_descriptions: list[str], files: list[UploadFile]) -> list[dict]:
+    """Every non-empty JD from the pasted texts and uploaded files, with a label for each"""
+    items = [
+        {"source": f"text_{i + 1}", "text": jd.strip()}
+        for i, jd in enumerate(job_descriptions or [])
+        if jd and jd.strip()
+    ]
+    texts = await asyncio.gather(*(read_upload_text(file) for file in files or []))
+    items.extend({"source": file.filename, "text": text} for file, text in zip(files or [], texts) if text)
+    return items
+
+
+async def _load_resume(db: AsyncSession, user_id: int) -> Resume:
+    resume = await db.scalar(select(Resume).where(Resume.user_id == user_id))
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found. Please create one first.")
+    return resume
 
-    # 🧩 Step 2: Extract text from job description
-    jd_text = job_description.strip()
-    if file:
-        if file.filename.endswith(".pdf"):
-            jd_text = extract_text_from_pdf(file)
-        elif file.filename.endswith((".docx", ".doc")):
-            jd_text = extract_text_from_docx(file)
-        else:
-            raise HTTPException(status_code=400, detail="Only PDF or DOCX files are supported.")
 
-    if not jd_text or len(jd_text) < 50:
-        raise HTTPException(status_code=400, detail="Job description is too short or empty.")
-    
-    # 🧩 Step 3: Build resume summary
-    resume_summary = f"""
-    Name: {resume.name}
-    Summary: {resume.summary}
-    Skills: {', '.join([s.skill for s in resume.skills])}
-    Experience: {', '.join([f"{e.title} at {e.company}" for e in resume.experiences])}
-    Education: {', '.join([f"{e.degree} - {e.school}" for e in resume.educations])}
-    Projects: {', '.join([p.name for p in resume.projects])}
+async def run_job_fit_analysis(jd_text: str, resume: Resume, db: AsyncSession, current_user) -> dict:
+    """
+    Full job fit analysis of one JD: local skill match plus Gemini
+    recommendations. Stages the JobFitAnalysis row and the activity on `db`;
+    the caller commits (get_async_db, or run_job_fit_analysis_in_session).
     """
+    resume_data = resume.resume_data or {}
+
+    # 🧩 Step 1: Local skill match + resume summary
+    skill_match = match_skills(jd_text, resume_data)
+    resume_summary = build_resume_summary(resume_data)
 
-    # 🧩 Step 4: Build AI prompt
+    # 🧩 Step 2: Build AI prompt
     prompt = f"""
     You are an expert AI job match analyzer.
     Compare the following job description with this candidate’s resume.
+    The skill comparison has already been done:
+    - Matched skills: {', '.join(skill_match["matched_skills"]) or "none"}
+    - Missing skills: {', '.join(skill_match["missing_skills"]) or "none"}
+    - Required skills match: {skill_match["required_skills_match"]}%
+
     Provide a **valid JSON** response only, with this structure:
 
     {{
-        "match_score": (integer 0–100),
-        "matched_skills": [list of matched skills],
-        "missing_skills": [list of missing skills],
         "recommendations": [
             {{
                 "title": "short suggestion",
@@ -97,7 +111,6 @@ async def analyze_job_description(job_description: str = Form(""),file: UploadFi
             }}
         ],
         "score_breakdown": {{
-            "required_skills_match": (integer 0–100),
             "experience_level_match": (integer 0–100),
             "education_requirements_match": (integer 0–100),
             "preferred_qualifications_match": (integer 0–100)
@@ -112,25 +125,26 @@ async def analyze_job_description(job_description: str = Form(""),file: UploadFi
     """
     
     text = ''
-    # 🧩 Step 5: Call Gemini API
+    # 🧩 Step 3: Call Gemini API
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")  # ✅ current supported model
-        result = model.generate_content(prompt)
-
-        # Extract and parse JSON safely
-        text = result.text.strip()
-        text = text.replace("```json", "").replace("```", "")
-        json_match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not json_match:
-            raise ValueError("AI did not return valid JSON")
-
-        data = json.loads(json_match.group(0))
+        # Extract and parse JSON safely (repeat analyses are served from the LLM cache)
+        data, text = await llm_gateway.generate_json(prompt, endpoint="job_fit", cache=True, user_id=current_user.id)
 
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
+
+    # Skill fields always come from the local match
+    breakdown = data.get("score_breakdown") or {}
+    breakdown["required_skills_match"] = skill_match["required_skills_match"]
+    data.update(
+        matched_skills=skill_match["matched_skills"],
+        missing_skills=skill_match["missing_skills"],
+        score_breakdown=breakdown,
+        match_score=int(round(sum(breakdown.get(k, 0) * w for k, w in JOB_FIT_WEIGHTS.items()))),
+    )
     
-    # 🧩 Step 6: Save analysis results in the database
+    # 🧩 Step 4: Save analysis results in the database
     analysis_entry = JobFitAnalysis(
         user_id=current_user.id,
         resume_id=resume.id,
@@ -142,20 +156,20 @@ async def analyze_job_description(job_description: str = Form(""),file: UploadFi
     )
 
     db.add(analysis_entry)
-    db.commit()
 
     from app.utils.ai_logger import save_ai_interaction
     ai_response = f"{text}"
     # Save the interaction
-    save_ai_interaction(
+    await asyncio.to_thread(
+        save_ai_interaction,
         user=current_user,
         prompt=prompt,
         response=ai_response,
         requirement_type='job_fit',
-        model_name="gemini-2.5-flash"
+        model_name=llm_gateway.DEFAULT_MODEL
     )
 
-    track_activity(db, current_user.id, "job_fit_analysis")
+    await track_activity_async(db, current_user.id, "job_fit_analysis")
     log_user_activity(
         db=db, 
         user_id=current_user.id, 
@@ -163,3 +177,91 @@ async def analyze_job_description(job_description: str = Form(""),file: UploadFi
         meta_data={"match_score": data.get("match_score", 0)}
     )
     return data
+
+
+async def run_job_fit_analysis_in_session(jd_text: str, resume: Resume, current_user) -> dict:
+    """run_job_fit_analysis with its own session, for analyses running concurrently (an AsyncSession can't be shared)"""
+    async with AsyncSessionLocal() as db:
+        data = await run_job_fit_analysis(jd_text, resume, db, current_user)
+        await db.commit()
+        return data
+
+
+# --- Main Route ---
+@router.post("/job/match")
+async def match_job_description(job_description: str = Form(""),file: UploadFile = File(None),db: AsyncSession = Depends(get_async_db),current_user=Depends(get_current_user_async)):
+    """
+    Instant local skill match between a job description and the user's resume (no AI call).
+    """
+    resume = await _load_resume(db, current_user.id)
+    jd_text = await read_job_description(job_description, file)
+    return await asyncio.to_thread(match_skills, jd_text, resume.resume_data or {})
+
+
+@router.post("/job/analyze")
+async def analyze_job_description(job_description: str = Form(""),file: UploadFile = File(None),db: AsyncSession = Depends(get_async_db),current_user=Depends(get_current_user_async)):
+    """
+    Analyze a job description (uploaded file or pasted text)
+    against the user's resume. Skills are matched locally; Gemini
+    only scores the non-skill criteria and writes recommendations.
+    """
+    resume = await _load_resume(db, current_user.id)
+    jd_text = await read_job_description(job_description, file)
+    return await run_job_fit_analysis(jd_text, resume, db, current_user)
+
+
+@router.post("/job/rank")
+async def rank_jobs(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """
+    Rank many job descriptions against the user's resume with the local
+    similarity model, then run the full Gemini analysis on the top_k only.
+
+    Multipart form: job_descriptions (repeated), files (repeated), top_k.
+    Parsed here rather than with Form()/File() params: Starlette's default
+    limit of 1000 fields/files would reject a full batch before the handler runs.
+    """
+    limit = settings.JOB_RANK_MAX_DESCRIPTIONS + 10  # room for top_k and stray fields
+    async with request.form(max_fields=limit, max_files=limit) as form:
+        job_descriptions = [v for v in form.getlist("job_descriptions") if isinstance(v, str)]
+        files = [v for v in form.getlist("files") if not isinstance(v, str)]
+        try:
+            top_k = int(form.get("top_k") or 3)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="top_k must be an integer.")
+        return await _rank_jobs(job_descriptions, files, top_k, db, current_user)
+
+
+async def _rank_jobs(job_descriptions: list[str], files: list[UploadFile], top_k: int, db: AsyncSession, current_user) -> dict:
+    resume = await _load_resume(db, current_user.id)
+    if len(job_descriptions) + len(files) > settings.JOB_RANK_MAX_DESCRIPTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.JOB_RANK_MAX_DESCRIPTIONS} job descriptions per request.")
+
+    # Extraction and scoring are CPU work; keep them off the event loop
+    items = await read_job_descriptions(job_descriptions, files)
+    if not items:
+        raise HTTPException(status_code=400, detail="No job descriptions provided.")
+    ranked = await asyncio.to_thread(rank_job_descriptions, [item["text"] for item in items], resume.resume_data or {})
+
+    top_k = max(0, min(top_k, settings.JOB_RANK_MAX_TOP_K, len(ranked)))
+    analyses = await asyncio.gather(
+        *(run_job_fit_analysis_in_session(items[entry["index"]]["text"], resume, current_user) for entry in ranked[:top_k]),
+        return_exceptions=True,
+    )
+
+    results = []
+    for rank, entry in enumerate(ranked, start=1):
+        result = {"rank": rank, "source": items[entry["index"]]["source"], **entry}
+        if rank <= top_k:
+            analysis = analyses[rank - 1]
+            if isinstance(analysis, Exception):
+                result["analysis"] = None
+                result["analysis_error"] = str(getattr(analysis, "detail", None) or analysis)
+            else:
+                result["analysis"] = analysis
+        results.append(result)
+
+    return {"count": len(results), "top_k": top_k, "results": results}
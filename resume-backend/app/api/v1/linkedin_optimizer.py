@@ -1,19 +1,17 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Form
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async
 from app.models.linkedin import LinkedInProfile
-import google.generativeai as genai
-from app.core.config import settings
+from app.core import llm_gateway
 import json, re, random
 from app.utils.change_ditect import get_changed_fields
 from app.utils.activity_tracker import log_user_activity
 
 router = APIRouter()
 
-# 🔑 Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
-
 @router.post("/linkedin/optimize")
 async def optimize_linkedin_about(
     about_section: str = Form(""),
@@ -21,8 +19,8 @@ async def optimize_linkedin_about(
     headline: str = Form(""),
     current_position: str = Form(""),
     skills: str = Form(""),
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
 ):
     """
     Optimize LinkedIn About section using AI based on target role.
@@ -73,15 +71,7 @@ async def optimize_linkedin_about(
     text = ''
     # 🎯 Step 2: Call Gemini
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        result = model.generate_content(prompt)
-        text = result.text.strip()
-        text = text.replace("```json", "").replace("```", "")
-        json_match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not json_match:
-            raise ValueError("AI did not return valid JSON")
-
-        data = json.loads(json_match.group(0))
+        data, text = await llm_gateway.generate_json(prompt, endpoint="linkedin", cache=True, user_id=current_user.id)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI optimization failed: {str(e)}")
@@ -103,7 +93,7 @@ async def optimize_linkedin_about(
     ])
 
     # 🎯 Step 4: Save or update DB record
-    existing_profile = db.query(LinkedInProfile).filter_by(user_id=current_user.id).first()
+    existing_profile = await db.scalar(select(LinkedInProfile).filter_by(user_id=current_user.id))
 
     if existing_profile:
         # Update existing record
@@ -140,17 +130,17 @@ async def optimize_linkedin_about(
             action="linkedin_optimize", 
             meta_data={"fields": changed_fields}
         )
-    db.commit()
 
     from app.utils.ai_logger import save_ai_interaction
     ai_response = f"{text}"
     # Save the interaction
-    save_ai_interaction(
+    await asyncio.to_thread(
+        save_ai_interaction,
         user=current_user,
         prompt=prompt,
         response=ai_response,
         requirement_type='linkedin',
-        model_name="gemini-2.5-flash"
+        model_name=llm_gateway.DEFAULT_MODEL
     )
 
     return {
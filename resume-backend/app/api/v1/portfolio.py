@@ -1,24 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models import (
     Portfolio, PortfolioPersonal, PortfolioExperience, PortfolioSkill, PortfolioProject, User
 )
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async
 from fastapi.responses import JSONResponse
-import google.generativeai as genai
+from app.core import llm_gateway
 import os
-from app.core.config import settings
 from fastapi.templating import Jinja2Templates
 from app.models.resume import Resume
 
 templates = Jinja2Templates(directory="app/templates/portfolio")
-genai.configure(api_key=settings.GEMINI_API_KEY)
 
 router = APIRouter()
 
 @router.post("/portfolio/generate")
-async def generate_portfolio(data: dict, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def generate_portfolio(data: dict, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user_async)):
     """
     Save or update a user's portfolio with normalized relational data.
     """
@@ -27,9 +26,8 @@ async def generate_portfolio(data: dict, db: Session = Depends(get_db), current_
         bio = data.get("bio", "")
         enhanced_bio = bio
         if bio and len(bio.split()) < 15:
-            model = genai.GenerativeModel("gemini-2.5-flash")
             prompt = f"Improve this developer bio to sound professional: {bio}"
-            enhanced_bio = model.generate_content(prompt).text.strip()
+            enhanced_bio = await llm_gateway.generate(prompt, endpoint="portfolio", user_id=current_user.id)
 
         # 1️⃣ Create Portfolio
         portfolio = Portfolio(
@@ -41,7 +39,7 @@ async def generate_portfolio(data: dict, db: Session = Depends(get_db), current_
             is_published=False
         )
         db.add(portfolio)
-        db.flush()  # Get portfolio.id immediately
+        await db.flush()  # Get portfolio.id immediately
 
         # 2️⃣ Add Personal Info
         personal = PortfolioPersonal(
@@ -58,12 +56,13 @@ async def generate_portfolio(data: dict, db: Session = Depends(get_db), current_
         db.add(personal)
 
         # 3️⃣ Add Skills
-        for skill_name in data.get("skills", []):
-            db.add(PortfolioSkill(portfolio_id=portfolio.id, name=skill_name, category="General"))
+        skills = [PortfolioSkill(portfolio_id=portfolio.id, name=skill_name, category="General")
+                  for skill_name in data.get("skills", [])]
+        db.add_all(skills)
 
         # 4️⃣ Add Projects
-        for project in data.get("projects", []):
-            db.add(PortfolioProject(
+        projects = [
+            PortfolioProject(
                 portfolio_id=portfolio.id,
                 name=project.get("name"),
                 description=project.get("description"),
@@ -71,21 +70,26 @@ async def generate_portfolio(data: dict, db: Session = Depends(get_db), current_
                 project_url=project.get("project_url", ""),
                 github_url=project.get("github_url", ""),
                 image_url=project.get("image_url", "")
-            ))
+            )
+            for project in data.get("projects", [])
+        ]
+        db.add_all(projects)
 
         # 5️⃣ Add Experience
-        for exp in data.get("experience", []):
-            db.add(PortfolioExperience(
+        experiences = [
+            PortfolioExperience(
                 portfolio_id=portfolio.id,
                 job_title=exp.get("title"),
                 company=exp.get("company"),
                 duration=exp.get("duration"),
                 description=exp.get("description"),
                 achievements=""
-            ))
-
-        db.commit()
-        db.refresh(portfolio)
+            )
+            for exp in data.get("experience", [])
+        ]
+        db.add_all(experiences)
+        # Committed by get_async_db; the response is built from the rows above, so no
+        # refresh (relationships can't lazy-load on an async session anyway)
 
         return JSONResponse(content={
             "id": portfolio.id,
@@ -93,15 +97,15 @@ async def generate_portfolio(data: dict, db: Session = Depends(get_db), current_
             "role": personal.title,
             "bio": personal.bio,
             "theme": portfolio.theme,
-            "skills": [s.name for s in portfolio.skills],
-            "projects": [p.name for p in portfolio.projects],
-            "experience": [e.job_title for e in portfolio.experiences],
+            "skills": [s.name for s in skills],
+            "projects": [p.name for p in projects],
+            "experience": [e.job_title for e in experiences],
             "preview_url": portfolio.published_url,
             "message": "Portfolio created successfully"
         })
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error generating portfolio: {str(e)}")
 
 @router.get("/portfolio/preview")
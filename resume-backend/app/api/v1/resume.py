@@ -1,26 +1,56 @@
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi import APIRouter, Depends, HTTPException, Response, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.resume import Resume
 from app.models.user import User
-from app.core.security import get_current_user  # token auth helper
-from app.utils.pdf_generator import generate_pdf_from_html
-from jinja2 import Environment, FileSystemLoader
-from app.utils.activity_tracker import track_activity, log_user_activity
+from app.core.security import get_current_user, get_current_user_async  # token auth helpers
+from app.utils.pdf_generator import render_first_page_png
+from app.utils.activity_tracker import track_activity_async, log_user_activity
 import io, os, base64
+import asyncio
+from typing import Literal
 from app.utils.change_ditect import get_changed_fields
 from app.models.user_feedback import UserFeedback
-
-TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "../../templates/resumes")
-env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+from app.utils import pdf_cache, prerender, template_registry
+from app.utils.sse import sse_event, SSE_HEADERS
+from app.utils.http_cache import file_response, is_not_modified, requested_range_start
+from app.core.config import settings
 
 router = APIRouter()
+
+
+# Rendered HTML previews may contain the user's own markup: never let it run scripts
+PREVIEW_HTML_HEADERS = {
+    "Content-Security-Policy": "sandbox; default-src 'none'; img-src * data:; style-src 'unsafe-inline' *; font-src * data:",
+}
+
+
+def resolve_template(template_id: str) -> dict:
+    """Registry entry for a template id; 404 if there is no such template."""
+    entry = template_registry.get_template(template_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return entry
+
+
+def render_resume_html(resume: Resume, template_id: str) -> str:
+    return resolve_template(template_id)["template"].render(resume=resume.resume_data)
+
+
+async def render_resume_pdf(resume: Resume, template_id: str) -> bytes:
+    """Render the resume with a template, serving repeat renders from the PDF cache."""
+    entry = resolve_template(template_id)
+    return await template_registry.render_cached_pdf(entry, resume.user_id, resume.resume_data)
+
+
 @router.post("/resume")
-async def create_or_update_resume(request: Request,db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
+async def create_or_update_resume(request: Request,db: AsyncSession = Depends(get_async_db),current_user: User = Depends(get_current_user_async)):
     data = await request.json()
     # Check if resume exists for this user
-    resume = db.query(Resume).filter(Resume.user_id == current_user.id).first()
+    resume = await db.scalar(select(Resume).where(Resume.user_id == current_user.id))
 
     if not resume:
         resume = Resume(user_id=current_user.id)
@@ -38,9 +68,13 @@ async def create_or_update_resume(request: Request,db: Session = Depends(get_db)
             meta_data={"fields": changed_fields}
         )
 
-    db.commit()
-    db.refresh(resume)
-    res_data = resume.resume_data or {}
+    # Committed here rather than by get_async_db: the prerender below compares against the stored resume
+    await db.commit()
+    await pdf_cache.invalidate_user_async(current_user.id)
+    # Warm the PDF cache for the templates this user is likely to download next
+    prerender.schedule(current_user.id, data, await prerender.likely_templates(db, current_user.id, data.get("template")))
+    # A copy: resume.resume_data is `data` itself (no refresh after commit), which the pre-render fingerprints
+    res_data = dict(resume.resume_data or {})
     if data['template'] != 'one' or data['template'] != 'two' or data['template'] != 'three':
         res_data['premium_template'] = True
 
@@ -58,48 +92,98 @@ def get_resume(db: Session = Depends(get_db), current_user: User = Depends(get_c
 
 @router.get("/resume/templates")
 def get_resume_templates():
-    return [
-        {"id": "one", "name": "Resume template one", "thumbnail": "/static/resume_thumbs/one.png", 'tier': 'free', 'category': 'modern'},
-        {"id": "two", "name": "Resume template two", "thumbnail": "/static/resume_thumbs/two.png", 'tier': 'free', 'category': 'modern'},
-        {"id": "three", "name": "Resume template three", "thumbnail": "/static/resume_thumbs/three.png", 'tier': 'free', 'category': 'modern'},
-        {"id": "four", "name": "Resume template four", "thumbnail": "/static/resume_thumbs/four.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "five", "name": "Resume template five", "thumbnail": "/static/resume_thumbs/five.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "six", "name": "Resume template six", "thumbnail": "/static/resume_thumbs/six.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "seven", "name": "Resume template seven", "thumbnail": "/static/resume_thumbs/seven.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "eight", "name": "Resume template eight", "thumbnail": "/static/resume_thumbs/eight.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "nine", "name": "Resume template nine", "thumbnail": "/static/resume_thumbs/nine.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "ten", "name": "Resume template ten", "thumbnail": "/static/resume_thumbs/ten.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "eleven", "name": "Resume template eleven", "thumbnail": "/static/resume_thumbs/eleven.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "twelve", "name": "Resume template twelve", "thumbnail": "/static/resume_thumbs/twelve.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "thirteen", "name": "Resume template thirteen", "thumbnail": "/static/resume_thumbs/thirteen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "fourteen", "name": "Resume template fourteen", "thumbnail": "/static/resume_thumbs/fourteen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "fifteen", "name": "Resume template fifteen", "thumbnail": "/static/resume_thumbs/fifteen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "sixteen", "name": "Resume template sixteen", "thumbnail": "/static/resume_thumbs/sixteen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "seventeen", "name": "Resume template seventeen", "thumbnail": "/static/resume_thumbs/seventeen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "eighteen", "name": "Resume template eighteen", "thumbnail": "/static/resume_thumbs/eighteen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "nineteen", "name": "Resume template nineteen", "thumbnail": "/static/resume_thumbs/nineteen.png", 'tier': 'premium', 'category': 'classical'},
-        {"id": "twenty", "name": "Resume template twenty", "thumbnail": "/static/resume_thumbs/twenty.png", 'tier': 'premium', 'category': 'classical'},
-    ]
+    return template_registry.list_templates()
+
+
+@router.get("/resume/templates/{template_id}/thumbnail")
+def get_resume_template_thumbnail(template_id: str):
+    """First-page PNG of the template rendered with sample data (generated at startup)."""
+    resolve_template(template_id)
+    png = template_registry.get_thumbnail(template_id)
+    if png is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not generated yet")
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": "public, max-age=86400"})
+
+@router.get("/resume/gallery")
+async def resume_gallery(
+    templates: str | None = None,
+    mode: Literal["png", "pdf"] = "png",
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """
+    Render the resume into every template (or a comma-separated subset) concurrently.
+    Streams one "template" event per template as soon as it is ready, in completion
+    order, with a base64 first-page PNG (mode=png) or the whole PDF (mode=pdf).
+    """
+    resume = await db.scalar(select(Resume).filter_by(user_id=current_user.id))
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    if templates:
+        template_ids = [t.strip() for t in templates.split(",") if t.strip()]
+        for template_id in template_ids:
+            resolve_template(template_id)
+    else:
+        template_ids = [t["id"] for t in template_registry.list_templates()]
+
+    # Bounded per request: queuing every template at once would fill the render pool's
+    # pending slots, turning other users' downloads into 503s and this gallery's tail into timeouts
+    render_slots = asyncio.Semaphore(max(1, settings.GALLERY_MAX_CONCURRENT_RENDERS))
+
+    async def render_one(template_id: str) -> dict:
+        try:
+            async with render_slots:
+                pdf_bytes = await render_resume_pdf(resume, template_id)
+            if mode == "png":
+                png_bytes = await asyncio.to_thread(render_first_page_png, pdf_bytes, settings.TEMPLATE_THUMBNAIL_WIDTH)
+                return {"id": template_id, "png": base64.b64encode(png_bytes).decode("utf-8")}
+            return {"id": template_id, "pdf": base64.b64encode(pdf_bytes).decode("utf-8")}
+        except Exception as e:
+            return {"id": template_id, "error": str(getattr(e, "detail", None) or e)}
+
+    async def event_stream():
+        # Cached templates return right away; the rest wait for one of the request's render slots
+        tasks = [asyncio.create_task(render_one(t)) for t in template_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield sse_event(result, event="error" if "error" in result else "template")
+            yield sse_event({"count": len(tasks)}, event="done")
+        finally:
+            # Client went away: don't keep rendering for nobody
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 
 @router.get("/resume/preview/{template_id}")
-def resume_preview(template_id: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    resume = db.query(Resume).filter_by(user_id=current_user.id).first()
+async def resume_preview(
+    template_id: str,
+    mode: Literal["pdf", "html", "png"] = "pdf",
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    """
+    Preview the resume with a template.
+    - pdf: base64 PDF in JSON (default)
+    - html: the rendered template itself, no PDF render at all
+    - png: first page of the (cached) PDF as an image
+    """
+    resume = await db.scalar(select(Resume).filter_by(user_id=current_user.id))
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    template_name = f"resume_template_{template_id}.html"
-    template_path = f"app/templates/resumes/{template_name}"
+    if mode == "html":
+        return HTMLResponse(render_resume_html(resume, template_id), headers=PREVIEW_HTML_HEADERS)
 
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=404, detail="Template not found")
+    # Render (or reuse the cached PDF)
+    pdf_bytes = await render_resume_pdf(resume, template_id)
 
-    # Load Jinja2 template
-    # template = env.get_template("resume_template_one.html")
-    template = env.get_template(template_name)
-    html_content = template.render(resume=resume.resume_data)
-
-    # Generate PDF
-    pdf_bytes = generate_pdf_from_html(html_content)
+    if mode == "png":
+        png_bytes = await asyncio.to_thread(render_first_page_png, pdf_bytes)
+        return Response(content=png_bytes, media_type="image/png")
 
     # Return Base64 for safe inline preview
     base64_pdf = base64.b64encode(pdf_bytes).decode("utf-8")
@@ -108,46 +192,34 @@ def resume_preview(template_id: str, db: Session = Depends(get_db), current_user
 
 
 @router.get("/resume/download/{template_id}")
-def download_resume(template_id: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    resume = db.query(Resume).filter_by(user_id=current_user.id).first()
+async def download_resume(template_id: str, request: Request, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user_async)):
+    resume = await db.scalar(select(Resume).filter_by(user_id=current_user.id))
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    template_name = f"resume_template_{template_id}.html"
-    template_path = f"app/templates/resumes/{template_name}"
-
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=404, detail="Template not found")
-
-    # Load Jinja2 template
-    # template = env.get_template("resume_template_one.html")
-    template = env.get_template(template_name)
-    html_content = template.render(resume=resume.resume_data)
-
-    # Generate PDF
-    pdf_bytes = generate_pdf_from_html(html_content)
+    # Render (or reuse the cached PDF)
+    pdf_bytes = await render_resume_pdf(resume, template_id)
 
-    # Save temporarily
-    file_path = f"/tmp/{current_user.id}_resume.pdf"
-    with open(file_path, "wb") as f:
-        f.write(pdf_bytes)
-
-    track_activity(db, current_user.id, "resume_download")
-    log_user_activity(
-        db=db, 
-        user_id=current_user.id, 
-        action="resume_downloaded", 
-        meta_data={"fields": {"template": "one"}}
-    )
+    # Resumed range requests are the same download, count it once; a 304 revalidation isn't a download
+    if requested_range_start(request) == 0 and not is_not_modified(request, pdf_bytes):
+        await track_activity_async(db, current_user.id, "resume_download")
+        log_user_activity(
+            db=db, 
+            user_id=current_user.id, 
+            action="resume_downloaded", 
+            meta_data={"fields": {"template": template_id}}
+        )
 
     # Check if the user already has feedback for the same type
     show_feedback = True
-    existing_feedback = (db.query(UserFeedback).filter(UserFeedback.user_id == current_user.id,UserFeedback.type_used == 'resume_download').first())
+    existing_feedback = await db.scalar(select(UserFeedback).filter(UserFeedback.user_id == current_user.id,UserFeedback.type_used == 'resume_download'))
     if existing_feedback:
         show_feedback = False
 
-    return Response(
-        content=pdf_bytes,
+    # ETag / 304 / Range handling, streamed in chunks
+    return file_response(
+        request,
+        pdf_bytes,
         media_type="application/pdf",
         headers={
             "Content-Disposition": "attachment; filename=resume.pdf",
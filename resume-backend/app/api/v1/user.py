@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, Request, File
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.user import User
-from app.core.security import get_current_user
-from app.core.security import hash_password, verify_password, get_current_user
+from app.core.security import get_current_user, get_current_user_async
+from app.core.security import hash_password, verify_password
 from app.utils.activity_tracker import log_user_activity
 from app.utils.change_ditect import get_changed_fields
 import os
@@ -40,8 +41,8 @@ def get_me(request: Request,current_user: User = Depends(get_current_user)):
 async def upload_avatar(
     request: Request,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     # Validate file type
     if not file.content_type.startswith("image/"):
@@ -77,8 +78,6 @@ async def upload_avatar(
         )
 
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
 
     return {
         "status": "success",
@@ -90,7 +89,7 @@ async def upload_avatar(
 # ✅ UPDATE PROFILE (name, email, avatar, career level)
 # -----------------------------------------
 @router.put("/user/profile")
-async def update_profile(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_profile(request: Request, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user_async)):
     try:
         data = await request.json()
     except Exception:
@@ -107,7 +106,7 @@ async def update_profile(request: Request, db: Session = Depends(get_db), curren
     phone = data.get("phone")
 
     if email and email != current_user.email:
-        existing = db.query(User).filter(User.email == email).first()
+        existing = await db.scalar(select(User).where(User.email == email))
         if existing:
             raise HTTPException(status_code=400, detail="Email already exists")
 
@@ -134,8 +133,6 @@ async def update_profile(request: Request, db: Session = Depends(get_db), curren
         )
 
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
 
     return {"message": "Profile updated successfully", "user": {
         "id": current_user.id,
@@ -149,7 +146,7 @@ async def update_profile(request: Request, db: Session = Depends(get_db), curren
 # ✅ CHANGE PASSWORD
 # -----------------------------------------
 @router.put("/user/password")
-async def change_password(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def change_password(request: Request, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user_async)):
     # Parse JSON body safely
     try:
         data = await request.json()
@@ -183,10 +180,7 @@ async def change_password(request: Request, db: Session = Depends(get_db), curre
             meta_data={"fields": changed_fields}
         )
 
-    # Commit to DB
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    db.add(current_user)  # committed by get_async_db
 
     return {
         "status": "success",
@@ -197,7 +191,7 @@ async def change_password(request: Request, db: Session = Depends(get_db), curre
 # ✅ UPDATE NOTIFICATION SETTINGS (darkMode, emailNotifications, marketingEmails)
 # -----------------------------------------
 @router.put("/user/settings")
-async def update_settings(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_settings(request: Request, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user_async)):
     try:
         data = await request.json()
     except Exception:
@@ -223,8 +217,6 @@ async def update_settings(request: Request, db: Session = Depends(get_db), curre
         )
 
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
 
     return {
         "message": "Settings updated successfully",
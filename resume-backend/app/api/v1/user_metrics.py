@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.core.database import get_db
-from app.models.metrics import UserMetrics
+from app.utils.activity_tracker import get_metric_count, track_activity
 from app.models.feature_request import FeatureRequest
 from app.core.security import get_current_user  # token auth helper
 from pydantic import BaseModel, EmailStr, Field
@@ -13,41 +13,20 @@ LIMIT_PER_FEATURE = 20
 
 @router.get("/check-feature/{feature_name}")
 def check_feature_usage(feature_name: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    metric = (
-        db.query(UserMetrics)
-        .filter(UserMetrics.user_id == current_user.id, UserMetrics.feature_name == feature_name)
-        .first()
-    )
-    
-    if not metric:
-        metric = UserMetrics(user_id=current_user.id, feature_name=feature_name, count=0)
-        db.add(metric)
-        db.commit()
-        db.refresh(metric)
+    # Read only: a feature never used simply counts as 0
+    used = get_metric_count(db, current_user.id, feature_name)
 
-    if metric.count >= LIMIT_PER_FEATURE:
-        return {"allowed": False, "used": metric.count, "limit": LIMIT_PER_FEATURE}
+    if used >= LIMIT_PER_FEATURE:
+        return {"allowed": False, "used": used, "limit": LIMIT_PER_FEATURE}
     
-    return {"allowed": True, "used": metric.count, "limit": LIMIT_PER_FEATURE}
+    return {"allowed": True, "used": used, "limit": LIMIT_PER_FEATURE}
 
 
 @router.post("/update-feature/{feature_name}")
 def update_feature_usage(feature_name: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    metric = (
-        db.query(UserMetrics)
-        .filter(UserMetrics.user_id == current_user.id, UserMetrics.feature_name == feature_name)
-        .first()
-    )
-    
-    if not metric:
-        metric = UserMetrics(user_id=current_user.id, feature_name=feature_name, count=1)
-        db.add(metric)
-    else:
-        metric.count += 1
-        metric.updated_at = datetime.utcnow()
-    
-    db.commit()
-    return {"message": "Feature count updated", "count": metric.count}
+    track_activity(db, current_user.id, feature_name)
+    # Read back in the same transaction: includes this increment and any that committed before it
+    return {"message": "Feature count updated", "count": get_metric_count(db, current_user.id, feature_name)}
 
 class FeatureRequestCreate(BaseModel):
     email: EmailStr
@@ -21,6 +21,73 @@ class Settings(BaseSettings):
     MAIL_TLS:str
     ADMIN_EMAIL:str
     OPENAI_API_KEY:str
+    ASYNC_DATABASE_URL:str = ""  # empty = DATABASE_URL with the async driver (aiomysql / aiosqlite)
+
+    # Connection pools. Each API worker has a sync and an async engine, so it can hold up to
+    # 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections: keep workers * that under MySQL max_connections
+    DB_POOL_SIZE:int = 5
+    DB_MAX_OVERFLOW:int = 10
+    DB_POOL_TIMEOUT:float = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE:int = 1800  # replace connections older than this, well before MySQL's wait_timeout
+    DB_POOL_PRE_PING:bool = False  # ping on every checkout; recycle + reconnect-on-error usually suffice
+
+    # Gemini / LLM gateway
+    GEMINI_MODEL:str = "gemini-2.5-flash"
+    LLM_MAX_CONCURRENCY:int = 32
+    LLM_DEFAULT_TIMEOUT:float = 60
+    LLM_CACHE_MAX_ENTRIES:int = 2048
+    LLM_CACHE_TTL_SECONDS:int = 60 * 60 * 24
+    LLM_CACHE_PERSIST:bool = False  # also keep responses in the llm_response_cache table (db/migrations/001_*.sql)
+
+    # Background jobs
+    JOB_BACKEND:str = "sql"  # "sql" (background_jobs table from db/migrations/001_*.sql, shared by all workers) or "memory" (single process only)
+    JOB_WORKERS:int = 4  # concurrent job runners per process; 0 = this process only enqueues
+    JOB_POLL_INTERVAL:float = 1.0
+    JOB_LEASE_SECONDS:int = 300  # a job runs at most this long; running jobs older than that (dead worker) are failed
+
+    # Rendered PDF cache
+    PDF_CACHE_MAX_BYTES:int = 64 * 1024 * 1024  # in-memory tier, per worker
+    PDF_CACHE_DIR:str = "/tmp/careerboost_pdf_cache"
+    PDF_CACHE_DISK_MAX_BYTES:int = 512 * 1024 * 1024  # 0 disables the disk tier
+
+    # Resume template registry
+    TEMPLATE_BYTECODE_CACHE_DIR:str = "/tmp/careerboost_jinja_cache"
+    TEMPLATE_AUTO_RELOAD:bool = False  # True re-checks template files on every render (local development)
+    TEMPLATE_THUMBNAIL_DIR:str = "/tmp/careerboost_thumbnails"
+    TEMPLATE_THUMBNAIL_WIDTH:int = 400
+
+    # PDF rendering pool
+    PDF_RENDER_WORKERS:int = 2  # WeasyPrint processes per API worker; 0 = render in a thread
+    PDF_RENDER_MAX_PENDING:int = 16  # queued + running renders per API worker
+    PDF_RENDER_QUEUE_TIMEOUT:float = 10
+    PDF_RENDER_TIMEOUT:float = 30
+    GALLERY_MAX_CONCURRENT_RENDERS:int = 2  # per gallery request, so one gallery can't take the whole pool
+
+    # Speculative pre-rendering after a resume save
+    PRERENDER_ENABLED:bool = True
+    PRERENDER_MAX_TEMPLATES:int = 3  # per user per save
+    PRERENDER_DELAY:float = 2.0  # debounce, seconds
+    PRERENDER_MAX_CONCURRENT:int = 2  # pre-renders in flight per worker
+
+    # Uploaded document extraction (resumes, job descriptions)
+    UPLOAD_MAX_BYTES:int = 10 * 1024 * 1024
+    UPLOAD_SPOOL_MAX_MEMORY:int = 1024 * 1024  # larger uploads are spooled to disk
+    DOCUMENT_MAX_PAGES:int = 50
+    DOCUMENT_PARALLEL_MIN_PAGES:int = 8  # smaller PDFs are extracted on a thread
+    DOCUMENT_EXTRACT_WORKERS:int = 2  # extraction processes per API worker; 0 = always a thread
+    DOCUMENT_PROMPT_MAX_CHARS:int = 40000  # uploaded text sent to Gemini is cut at a page boundary
+    DOCUMENT_CACHE_MAX_BYTES:int = 32 * 1024 * 1024  # extracted text cached per worker by upload hash
+
+    # Write-behind activity log (app/utils/activity_sink.py)
+    ACTIVITY_SINK_ENABLED:bool = True  # False: user_activities rows are inserted by the request's own commit
+    ACTIVITY_QUEUE_MAX:int = 10000  # buffered events per worker
+    ACTIVITY_FLUSH_INTERVAL_MS:int = 500
+    ACTIVITY_FLUSH_BATCH:int = 200  # rows per INSERT
+    ACTIVITY_SPILL_DIR:str = ""  # when set, events that don't fit in the queue are spilled here as JSONL instead of dropped
+
+    # Bulk job ranking
+    JOB_RANK_MAX_DESCRIPTIONS:int = 1000
+    JOB_RANK_MAX_TOP_K:int = 5  # deep Gemini analyses per ranking request
     
     class Config:
         env_file = ".env"
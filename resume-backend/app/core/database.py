@@ -1,6 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core import db_metrics
+from app.core.db_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+
+# Async driver for each backend the sync DATABASE_URL may point at
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
 # from app.models.user import User
 # from app.models.resume import Resume
@@ -18,15 +25,64 @@ from app.core.config import settings
 # from app.models.subscription import Subscription
 # from app.models.user_feedback import UserFeedback
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def pool_options(url: str, poolclass) -> dict:
+    """Pool sizing from settings. SQLite keeps SQLAlchemy's default pool (no sizing, no metrics)."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL, TimedQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+db_metrics.instrument(engine, "sync")
+
+
+def make_async_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the async one (mysql+pymysql -> mysql+aiomysql)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+# Same database for async routes; queries are awaited instead of blocking the event loop
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or make_async_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, TimedAsyncAdaptedQueuePool))
+db_metrics.instrument(async_engine.sync_engine, "async")
+# expire_on_commit=False: attributes stay readable after commit (no implicit refresh IO)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-# Dependency for FastAPI routes
+# Dependency for FastAPI routes: one unit of work per request. Whatever the
+# route (and the activity helpers) staged is committed once when it returns,
+# or rolled back if it raised (HTTPException included).
 def get_db():
     db = SessionLocal()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+
+# Dependency for async routes, same unit of work as get_db
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
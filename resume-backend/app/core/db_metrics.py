@@ -0,0 +1,134 @@
+"""
+Connection pool and query instrumentation for the sync and async engines.
+
+- pool: checkout wait time (total / max), checkout timeouts and the peak
+  number of connections in use, via pool classes that time each checkout
+- queries: count and time per engine, via before/after_cursor_execute
+- per request: QueryStatsMiddleware opens a stats dict in a contextvar,
+  every query executed while handling the request adds to it, and the
+  totals are aggregated per route (see record_request)
+
+Everything is per worker process, like the other /health counters.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+_lock = threading.Lock()
+_pool_stats: dict[str, dict] = {}
+_query_stats: dict[str, dict] = {}
+_route_stats: dict[str, dict] = {}
+
+_current_request: ContextVar[dict | None] = ContextVar("db_request_stats", default=None)
+
+
+class _TimedCheckoutMixin:
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with _lock:
+                _pool_stats_for(self.metrics_name)["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        in_use = self.checkedout()
+        with _lock:
+            stats = _pool_stats_for(self.metrics_name)
+            stats["checkouts"] += 1
+            stats["wait_seconds_total"] += waited
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+            stats["in_use_peak"] = max(stats["in_use_peak"], in_use)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics_name = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+def _pool_stats_for(name: str) -> dict:
+    return _pool_stats.setdefault(name, {
+        "checkouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0, "timeouts": 0, "in_use_peak": 0,
+    })
+
+
+def instrument(engine, name: str):
+    """Count and time every query run on `engine` (a sync Engine; pass async_engine.sync_engine)."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        with _lock:
+            stats = _query_stats.setdefault(name, {"queries": 0, "seconds": 0.0})
+            stats["queries"] += 1
+            stats["seconds"] += elapsed
+        request = _current_request.get()
+        if request is not None:
+            request["queries"] += 1
+            request["seconds"] += elapsed
+
+
+def start_request():
+    """Start counting queries for the current request. Returns (token, stats)."""
+    stats = {"queries": 0, "seconds": 0.0}
+    return _current_request.set(stats), stats
+
+
+def end_request(token):
+    _current_request.reset(token)
+
+
+def record_request(route: str, stats: dict):
+    with _lock:
+        totals = _route_stats.setdefault(route, {
+            "requests": 0, "queries": 0, "max_queries": 0, "db_seconds": 0.0, "max_db_seconds": 0.0,
+        })
+        totals["requests"] += 1
+        totals["queries"] += stats["queries"]
+        totals["max_queries"] = max(totals["max_queries"], stats["queries"])
+        totals["db_seconds"] += stats["seconds"]
+        totals["max_db_seconds"] = max(totals["max_db_seconds"], stats["seconds"])
+
+
+def _pool_status(pool) -> dict:
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+def get_stats(engines: dict) -> dict:
+    """engines: name -> sync Engine. Current pool state plus the counters above."""
+    with _lock:
+        pools = {}
+        for name, engine in engines.items():
+            counters = dict(_pool_stats_for(name))
+            checkouts = counters["checkouts"]
+            counters["wait_seconds_avg"] = round(counters["wait_seconds_total"] / checkouts, 6) if checkouts else 0.0
+            pools[name] = {**_pool_status(engine.pool), **counters}
+        routes = {
+            route: {
+                **s,
+                "avg_queries": round(s["queries"] / s["requests"], 2),
+                "avg_db_seconds": round(s["db_seconds"] / s["requests"], 6),
+            }
+            for route, s in _route_stats.items()
+        }
+        return {"pools": pools, "queries": {k: dict(v) for k, v in _query_stats.items()}, "routes": routes}
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.llm_cache import LLMResponseCache
+
+# In-process tier: LRU eviction once full, entries expire after the TTL
+_memory = TTLCache(maxsize=settings.LLM_CACHE_MAX_ENTRIES, ttl=settings.LLM_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+
+# endpoint -> {"hits": n, "misses": n, "persistent_hits": n}
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0, "persistent_hits": 0})
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so indentation changes in the f-string prompts don't bust the cache."""
+    return _WHITESPACE_RE.sub(" ", prompt).strip()
+
+
+def make_key(model_name: str, prompt: str) -> str:
+    payload = f"{model_name}\n{normalize_prompt(prompt)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _read_persistent(key: str) -> str | None:
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(LLMResponseCache)
+            .filter(LLMResponseCache.cache_key == key, LLMResponseCache.expires_at > datetime.utcnow())
+            .first()
+        )
+        return row.response if row else None
+    finally:
+        db.close()
+
+
+def _write_persistent(key: str, model_name: str, endpoint: str, response: str):
+    db = SessionLocal()
+    try:
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.LLM_CACHE_TTL_SECONDS)
+        row = db.query(LLMResponseCache).filter(LLMResponseCache.cache_key == key).first()
+        if row:
+            row.response = response
+            row.expires_at = expires_at
+        else:
+            db.add(LLMResponseCache(
+                cache_key=key,
+                model_name=model_name,
+                endpoint=endpoint,
+                response=response,
+                expires_at=expires_at,
+            ))
+        db.commit()
+    except Exception as e:
+        # A failed cache write must never fail the request
+        db.rollback()
+        print(f"⚠ Could not persist LLM cache entry: {e}")
+    finally:
+        db.close()
+
+
+async def lookup(key: str, endpoint: str) -> str | None:
+    """Look a response up in memory first, then in the persistent tier (if enabled)."""
+    with _lock:
+        value = _memory.get(key)
+    if value is not None:
+        _stats[endpoint]["hits"] += 1
+        return value
+
+    if settings.LLM_CACHE_PERSIST:
+        try:
+            value = await asyncio.to_thread(_read_persistent, key)
+        except Exception as e:
+            print(f"⚠ Could not read LLM cache entry: {e}")
+            value = None
+        if value is not None:
+            with _lock:
+                _memory[key] = value
+            _stats[endpoint]["hits"] += 1
+            _stats[endpoint]["persistent_hits"] += 1
+            return value
+
+    _stats[endpoint]["misses"] += 1
+    return None
+
+
+async def store(key: str, model_name: str, endpoint: str, response: str):
+    with _lock:
+        _memory[key] = response
+    if settings.LLM_CACHE_PERSIST:
+        await asyncio.to_thread(_write_persistent, key, model_name, endpoint, response)
+
+
+def get_stats() -> dict:
+    """Hit/miss counters per endpoint for this worker."""
+    stats = {}
+    for endpoint, counters in _stats.items():
+        total = counters["hits"] + counters["misses"]
+        stats[endpoint] = {
+            **counters,
+            "hit_rate": round(counters["hits"] / total, 3) if total else 0.0,
+        }
+    with _lock:
+        size = len(_memory)
+    return {"entries": size, "max_entries": _memory.maxsize, "endpoints": stats}
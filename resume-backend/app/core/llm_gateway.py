@@ -0,0 +1,157 @@
+import asyncio
+import json
+import re
+import google.generativeai as genai
+from app.core.config import settings
+from app.core import llm_cache
+from app.utils.single_flight import SingleFlight, make_flight_key
+
+# 🔑 Configure Gemini once for the whole app
+genai.configure(api_key=settings.GEMINI_API_KEY)
+
+DEFAULT_MODEL = settings.GEMINI_MODEL
+
+# Per-endpoint timeouts in seconds (requirement_type -> timeout)
+ENDPOINT_TIMEOUTS = {
+    "ats_check": 90,
+    "job_fit": 60,
+    "linkedin": 45,
+    "resume": 60,
+    "cover_letter": 45,
+    "portfolio": 20,
+}
+
+_models: dict[str, genai.GenerativeModel] = {}
+_semaphores: dict[int, asyncio.Semaphore] = {}
+_flight = SingleFlight()
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a Gemini call does not finish within its endpoint timeout."""
+
+
+def get_model(model_name: str = DEFAULT_MODEL) -> genai.GenerativeModel:
+    """Return a shared GenerativeModel instance for the given model name."""
+    model = _models.get(model_name)
+    if model is None:
+        model = genai.GenerativeModel(model_name)
+        _models[model_name] = model
+    return model
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # One semaphore per event loop, so each worker bounds its own in-flight calls
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(id(loop))
+    if sem is None:
+        sem = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        _semaphores[id(loop)] = sem
+    return sem
+
+
+def get_timeout(endpoint: str) -> float:
+    return ENDPOINT_TIMEOUTS.get(endpoint, settings.LLM_DEFAULT_TIMEOUT)
+
+
+def clean_json_text(text: str) -> str:
+    """Strip markdown code fences Gemini likes to wrap JSON in."""
+    return text.strip().replace("```json", "").replace("```", "")
+
+
+async def _call_model(prompt: str, endpoint: str, model_name: str) -> str:
+    timeout = get_timeout(endpoint)
+    model = get_model(model_name)
+    async with _get_semaphore():
+        try:
+            result = await asyncio.wait_for(
+                model.generate_content_async(prompt, request_options={"timeout": timeout}),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"Gemini did not respond within {timeout}s ({endpoint})")
+    return (result.text or "").strip()
+
+
+async def _coalesced_call(prompt: str, endpoint: str, model_name: str, user_id) -> str:
+    # Identical in-flight prompts from the same user share one Gemini call
+    if user_id is None:
+        return await _call_model(prompt, endpoint, model_name)
+    key = make_flight_key(user_id, model_name, prompt)
+    return await _flight.run(key, _call_model, prompt, endpoint, model_name)
+
+
+async def generate(prompt: str, endpoint: str, model_name: str = DEFAULT_MODEL, user_id=None) -> str:
+    """
+    Send a prompt to Gemini without blocking the event loop.
+
+    Concurrency is bounded per worker by LLM_MAX_CONCURRENCY and each call is
+    cancelled after the timeout configured for `endpoint`.
+    When `user_id` is given, a duplicate request for the same prompt waits on
+    the call already in flight instead of sending a second one.
+    Returns the stripped response text.
+    """
+    return await _coalesced_call(prompt, endpoint, model_name, user_id)
+
+
+async def generate_json(prompt: str, endpoint: str, model_name: str = DEFAULT_MODEL, cache: bool = False, user_id=None, cache_key: str | None = None) -> tuple[dict, str]:
+    """
+    Like generate(), but parses the JSON object out of the response.
+    With cache=True the response is served from / stored in the LLM response cache.
+    Only responses that parse are cached, so a malformed answer is retried next time.
+    The cache is keyed on the prompt, or on `cache_key` (plus endpoint) when the
+    caller has a stable identity for the input, such as an uploaded file's hash.
+    Returns (data, cleaned_text).
+    """
+    key = None
+    if cache:
+        key = llm_cache.make_key(model_name, f"{endpoint}\n{cache_key}" if cache_key else prompt)
+    if key:
+        cached = await llm_cache.lookup(key, endpoint)
+        if cached is not None:
+            return parse_json_response(cached), cached
+
+    text = clean_json_text(await _coalesced_call(prompt, endpoint, model_name, user_id))
+    data = parse_json_response(text)
+    if key:
+        await llm_cache.store(key, model_name, endpoint, text)
+    return data, text
+
+
+def parse_json_response(text: str) -> dict:
+    json_match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not json_match:
+        raise ValueError(f"AI did not return valid JSON; raw_output={text[:1000]}")
+    try:
+        return json.loads(json_match.group(0))
+    except Exception as e:
+        # include raw text in exception so debugging easier
+        raise ValueError(f"Failed to parse Gemini JSON. error={e}; raw_output={text[:1000]}")
+
+
+async def stream(prompt: str, endpoint: str, model_name: str = DEFAULT_MODEL):
+    """
+    Async generator yielding Gemini response text chunks as they arrive.
+
+    Holds a concurrency slot for the whole stream. The endpoint timeout is
+    applied as an overall deadline, checked while waiting for each chunk.
+    """
+    timeout = get_timeout(endpoint)
+    model = get_model(model_name)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    async with _get_semaphore():
+        try:
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt, stream=True, request_options={"timeout": timeout}),
+                timeout=timeout,
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    yield chunk.text
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"Gemini did not respond within {timeout}s ({endpoint})")
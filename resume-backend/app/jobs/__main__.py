@@ -0,0 +1,26 @@
+"""
+Dedicated job worker process, so AI work scales separately from the API workers:
+
+    python -m app.jobs
+
+Run the API with JOB_WORKERS=0 (and JOB_BACKEND=sql) to make it enqueue only.
+"""
+import asyncio
+import signal
+
+import app.main  # noqa: F401 - imports every router so their job handlers get registered
+from app.core.config import settings
+from app.jobs.worker import run_forever
+from app.utils import activity_sink
+
+if __name__ == "__main__":
+    # SIGTERM (docker stop) unwinds like Ctrl+C: running jobs are requeued and the finally runs
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    activity_sink.start()
+    try:
+        asyncio.run(run_forever(max(settings.JOB_WORKERS, 1)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Same as the API's shutdown hook: flush the activity the jobs logged
+        activity_sink.stop()
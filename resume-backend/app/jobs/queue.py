@@ -0,0 +1,257 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.job import BackgroundJob
+
+ACTIVE_STATUSES = ("queued", "running")
+LEASE_EXPIRED_ERROR = "The job did not finish in time (worker stopped or timed out). Please try again."
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class JobBackend:
+    """
+    Storage + hand-off for background jobs.
+    Jobs are plain dicts: id, user_id, job_type, status, payload, result, error.
+    """
+
+    def enqueue(self, job_type: str, user_id: int, payload: dict, dedupe_key: str | None = None) -> str:
+        raise NotImplementedError
+
+    def claim(self) -> dict | None:
+        """Mark the oldest queued job as running and return it (None if the queue is empty)."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, result: dict):
+        raise NotImplementedError
+
+    def fail(self, job_id: str, error: str):
+        raise NotImplementedError
+
+    def requeue(self, job_id: str):
+        """Put a running job back in the queue (its worker was stopped before finishing)."""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> dict | None:
+        raise NotImplementedError
+
+
+class InMemoryJobBackend(JobBackend):
+    """Process-local queue. Only suitable when the API runs as a single worker."""
+
+    MAX_FINISHED = 1000
+
+    def __init__(self):
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._queue: deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_type, user_id, payload, dedupe_key=None):
+        with self._lock:
+            if dedupe_key:
+                for job in self._jobs.values():
+                    if job["dedupe_key"] == dedupe_key and job["status"] in ACTIVE_STATUSES:
+                        return job["id"]
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                "id": job_id,
+                "user_id": user_id,
+                "job_type": job_type,
+                "status": "queued",
+                "dedupe_key": dedupe_key,
+                "payload": payload,
+                "result": None,
+                "error": None,
+            }
+            self._queue.append(job_id)
+            self._trim()
+            return job_id
+
+    def claim(self):
+        with self._lock:
+            if not self._queue:
+                return None
+            job = self._jobs[self._queue.popleft()]
+            job["status"] = "running"
+            return dict(job)
+
+    def complete(self, job_id, result):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status="done", result=result, payload=None)
+
+    def fail(self, job_id, error):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status="failed", error=error, payload=None)
+
+    def requeue(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job["status"] == "running":
+                job["status"] = "queued"
+                self._queue.appendleft(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _trim(self):
+        finished = [jid for jid, job in self._jobs.items() if job["status"] not in ACTIVE_STATUSES]
+        for jid in finished[:max(len(finished) - self.MAX_FINISHED, 0)]:
+            del self._jobs[jid]
+
+
+class SQLJobBackend(JobBackend):
+    """
+    Queue stored in the background_jobs table, shared by every API and worker process.
+    A running job holds a lease of JOB_LEASE_SECONDS from started_at; once it has
+    expired the job's worker is gone (handlers are cancelled at the lease), so the
+    job is failed instead of blocking dedupe and status polls forever.
+    Expired leases are swept at most once per JOB_LEASE_SECONDS in each process, not on every call.
+    """
+
+    def __init__(self):
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def _expire_stale(self, db):
+        with self._sweep_lock:
+            if time.monotonic() < self._next_sweep:
+                return
+            self._next_sweep = time.monotonic() + settings.JOB_LEASE_SECONDS
+        cutoff = _now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        expired = (
+            db.query(BackgroundJob)
+            .filter(BackgroundJob.status == "running", BackgroundJob.started_at < cutoff)
+            .update(
+                {"status": "failed", "error": LEASE_EXPIRED_ERROR, "payload": None, "finished_at": _now()},
+                synchronize_session=False,
+            )
+        )
+        if expired:
+            print(f"⚠ Failed {expired} background job(s) past their lease")
+        db.commit()
+
+    def enqueue(self, job_type, user_id, payload, dedupe_key=None):
+        db = SessionLocal()
+        try:
+            self._expire_stale(db)
+            if dedupe_key:
+                existing = (
+                    db.query(BackgroundJob.id)
+                    .filter(BackgroundJob.dedupe_key == dedupe_key, BackgroundJob.status.in_(ACTIVE_STATUSES))
+                    .first()
+                )
+                if existing:
+                    return existing.id
+            job = BackgroundJob(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                job_type=job_type,
+                status="queued",
+                dedupe_key=dedupe_key,
+                payload=payload,
+            )
+            db.add(job)
+            db.commit()
+            return job.id
+        finally:
+            db.close()
+
+    def claim(self):
+        db = SessionLocal()
+        try:
+            self._expire_stale(db)
+            # SKIP LOCKED lets several worker processes pull from the table without blocking each other
+            job = (
+                db.query(BackgroundJob)
+                .filter(BackgroundJob.status == "queued")
+                .order_by(BackgroundJob.created_at)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if not job:
+                db.rollback()
+                return None
+            job.status = "running"
+            job.started_at = _now()
+            claimed = self._to_dict(job)
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def complete(self, job_id, result):
+        self._finish(job_id, status="done", result=result)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, status="failed", error=error)
+
+    def requeue(self, job_id):
+        db = SessionLocal()
+        try:
+            db.query(BackgroundJob).filter(BackgroundJob.id == job_id, BackgroundJob.status == "running").update(
+                {"status": "queued", "started_at": None}, synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, job_id):
+        db = SessionLocal()
+        try:
+            self._expire_stale(db)
+            job = db.get(BackgroundJob, job_id)
+            return self._to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        db = SessionLocal()
+        try:
+            job = db.get(BackgroundJob, job_id)
+            job.status = status
+            job.result = result
+            job.error = error
+            job.payload = None  # the extracted text is no longer needed
+            job.finished_at = _now()
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _to_dict(job: BackgroundJob) -> dict:
+        return {
+            "id": job.id,
+            "user_id": job.user_id,
+            "job_type": job.job_type,
+            "status": job.status,
+            "dedupe_key": job.dedupe_key,
+            "payload": job.payload,
+            "result": job.result,
+            "error": job.error,
+        }
+
+
+JOB_BACKENDS = {
+    "memory": InMemoryJobBackend,
+    "sql": SQLJobBackend,
+}
+
+_backend: JobBackend | None = None
+
+
+def get_backend() -> JobBackend:
+    global _backend
+    if _backend is None:
+        _backend = JOB_BACKENDS[settings.JOB_BACKEND]()
+    return _backend
@@ -0,0 +1,93 @@
+import asyncio
+
+from app.core.config import settings
+from app.jobs.queue import get_backend
+
+# job_type -> async handler(job: dict) -> dict
+JOB_HANDLERS = {}
+
+_tasks: list[asyncio.Task] = []
+_wakeup: asyncio.Event | None = None
+
+
+def register_job(job_type: str):
+    """Decorator registering the coroutine that runs jobs of `job_type`."""
+    def decorator(fn):
+        JOB_HANDLERS[job_type] = fn
+        return fn
+    return decorator
+
+
+async def submit_job(job_type: str, user_id: int, payload: dict, dedupe_key: str | None = None) -> str:
+    """
+    Queue a job and wake the local workers. Returns the job id.
+    A submit matching the dedupe_key of a queued/running job returns that job's id instead.
+    """
+    job_id = await asyncio.to_thread(get_backend().enqueue, job_type, user_id, payload, dedupe_key)
+    if _wakeup is not None:
+        _wakeup.set()
+    return job_id
+
+
+async def _run_job(job: dict):
+    backend = get_backend()
+    handler = JOB_HANDLERS.get(job["job_type"])
+    if handler is None:
+        await asyncio.to_thread(backend.fail, job["id"], f"No handler for job type {job['job_type']}")
+        return
+    try:
+        # Bounded by the lease: past it the SQL backend treats the job as abandoned
+        result = await asyncio.wait_for(handler(job), timeout=settings.JOB_LEASE_SECONDS)
+    except asyncio.CancelledError:
+        # Stopped with the process: hand the job to the next worker instead of leaving it "running"
+        await asyncio.to_thread(backend.requeue, job["id"])
+        raise
+    except asyncio.TimeoutError:
+        await asyncio.to_thread(backend.fail, job["id"], "The job took too long. Please try again.")
+    except Exception as e:
+        detail = getattr(e, "detail", None) or str(e)
+        await asyncio.to_thread(backend.fail, job["id"], str(detail))
+    else:
+        await asyncio.to_thread(backend.complete, job["id"], result)
+
+
+async def _worker_loop():
+    backend = get_backend()
+    while True:
+        try:
+            job = await asyncio.to_thread(backend.claim)
+        except Exception as e:
+            print(f"⚠ Job queue unavailable: {e}")
+            job = None
+
+        if job is None:
+            # Sleep until a local submit wakes us, or poll again for jobs queued by other processes
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+            continue
+
+        await _run_job(job)
+
+
+def start_workers(count: int = settings.JOB_WORKERS):
+    global _wakeup
+    if _tasks or count <= 0:
+        return
+    _wakeup = asyncio.Event()
+    for _ in range(count):
+        _tasks.append(asyncio.create_task(_worker_loop()))
+
+
+async def stop_workers():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+async def run_forever(count: int):
+    start_workers(count)
+    await asyncio.gather(*_tasks)
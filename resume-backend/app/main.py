@@ -1,10 +1,15 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import health, auth, resume, ai_resume, ai_cover_letter, job_analyzer, linkedin_optimizer, portfolio, user, feedback, user_metrics, ats
 from fastapi.staticfiles import StaticFiles
 import os
 from app.core.config import settings
+from app.core.database import async_engine
 from app.middleware.tracking import TrackingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.jobs import worker as job_worker
+from app.utils import activity_sink, document_extractor, pdf_pool, prerender, template_registry
 
 app = FastAPI(
     title="SmartCV Maker AI Backend",
@@ -23,6 +28,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(TrackingMiddleware)
+app.add_middleware(QueryStatsMiddleware)  # outermost: also counts TrackingMiddleware's queries
 
 # ✅ Ensure upload folder exists
 os.makedirs("uploads/avatars", exist_ok=True)
@@ -40,6 +46,26 @@ app.include_router(feedback.router, prefix="/api/v1", tags=["User FeedBack"])
 app.include_router(user_metrics.router, prefix="/api/v1", tags=["User metrics"])
 app.include_router(ats.router, prefix="/api/v1", tags=["ats"])
 
+@app.on_event("startup")
+async def start_background_workers():
+    activity_sink.start()
+    job_worker.start_workers()
+    template_registry.load()
+    await pdf_pool.start()
+    # Thumbnails need the render pool; build them without delaying startup
+    app.state.thumbnail_task = asyncio.create_task(template_registry.generate_thumbnails())
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await job_worker.stop_workers()
+    await prerender.cancel_all()
+    pdf_pool.shutdown()
+    document_extractor.shutdown()
+    # After the jobs, which log activity too; joins the flusher thread, so off the event loop
+    await asyncio.to_thread(activity_sink.stop)
+    await async_engine.dispose()
+
 # Serve uploaded avatars
 # ✅ Mount uploads folder to serve files
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
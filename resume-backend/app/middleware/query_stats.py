@@ -0,0 +1,24 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core import db_metrics
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    Counts the queries (and their time) each request runs, aggregates them per
+    route for /health/db and reports them in a Server-Timing header.
+    Queries run while a streaming body is sent are not included.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        token, stats = db_metrics.start_request()
+        try:
+            response = await call_next(request)
+        finally:
+            db_metrics.end_request(token)
+
+        route = request.scope.get("route")
+        db_metrics.record_request(f"{request.method} {route.path if route else 'unmatched'}", stats)
+        response.headers["Server-Timing"] = f'db;desc="{stats["queries"]} queries";dur={stats["seconds"] * 1000:.1f}'
+        return response
@@ -1,3 +1,5 @@
+import asyncio
+
 import requests
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -40,11 +42,10 @@ def load_geoip_reader():
 
 geo_reader = load_geoip_reader()
 
-class TrackingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-
-        ip = request.headers.get("CF-Connecting-IP") or request.client.host
-        db = SessionLocal()
+def log_visitor(ip: str, user_agent: str | None):
+    """Record the first visit from an IP. Blocking (DB + GeoIP lookup): run it off the event loop."""
+    db = SessionLocal()
+    try:
         log = db.query(VisitorLog).filter(VisitorLog.ip == ip).first()
 
         if not log:
@@ -63,12 +64,18 @@ class TrackingMiddleware(BaseHTTPMiddleware):
             except:
                 pass
 
-            user_agent = request.headers.get("User-Agent")
-
             log = VisitorLog(ip=ip, country=country, city=city, user_agent=user_agent)
             db.add(log)
             db.commit()
-            db.close()
+    finally:
+        db.close()
+
+
+class TrackingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+
+        ip = request.headers.get("CF-Connecting-IP") or request.client.host
+        await asyncio.to_thread(log_visitor, ip, request.headers.get("User-Agent"))
 
         response = await call_next(request)
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id = Column(String(36), primary_key=True)  # uuid4
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    job_type = Column(String(50), nullable=False)  # e.g. ats_check
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, done, failed
+    dedupe_key = Column(String(128), nullable=True, index=True)  # user + payload hash, to fold duplicate submits
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class LLMResponseCache(Base):
+    __tablename__ = "llm_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of (model, normalized prompt)
+    model_name = Column(String(100), nullable=False)
+    endpoint = Column(String(64), nullable=True)  # e.g. ats_check, job_fit, linkedin, resume
+    response = Column(Text().with_variant(MEDIUMTEXT(), "mysql"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,10 +1,13 @@
 # app/models/user_feature_usage.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class UserMetrics(Base):
     __tablename__ = "user_metrics"
+    # One counter row per user and feature: the key the upsert in activity_tracker
+    # conflicts on, and the index every count lookup uses
+    __table_args__ = (UniqueConstraint("user_id", "feature_name", name="uq_user_metrics_user_feature"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
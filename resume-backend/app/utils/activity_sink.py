@@ -0,0 +1,236 @@
+"""
+Write-behind sink for user activity rows.
+
+log_user_activity stages an event on the request's session; when that
+session commits, the events are pushed onto a bounded in-memory queue (a
+rollback drops them), so the request never waits on the insert. A flusher
+thread drains the queue every ACTIVITY_FLUSH_INTERVAL_MS, or as soon as
+ACTIVITY_FLUSH_BATCH events are waiting, with one multi-row INSERT per batch.
+
+- queue full: events are appended to a JSONL file in ACTIVITY_SPILL_DIR
+  (one file per worker process) and inserted once the queue is idle again;
+  without a spill dir they are dropped and counted
+- a failed INSERT spills the batch the same way (or drops it)
+- stop() drains the queue before the worker exits; spill files left behind
+  by dead workers are picked up by the next one that starts
+"""
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.activity import UserActivity
+
+PENDING_KEY = "pending_activity"
+SPILL_PREFIX = "activity-"
+
+_queue: queue.Queue = queue.Queue(maxsize=settings.ACTIVITY_QUEUE_MAX)
+_thread: threading.Thread | None = None
+_stopping = threading.Event()
+_lock = threading.Lock()  # start/stop and spill file writes
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "dropped": 0, "failed_batches": 0}
+
+
+def make_event(user_id: int, action: str, meta_data: dict | None = None) -> dict:
+    # Timestamped now: the row is inserted later, so server_default would record the flush time
+    return {"user_id": user_id, "action": action, "meta_data": meta_data or {}, "created_at": datetime.utcnow()}
+
+
+def stage(db, activity: dict):
+    """Hold an event on a session (sync or async) until it commits."""
+    db.info.setdefault(PENDING_KEY, []).append(activity)
+
+
+@event.listens_for(Session, "after_commit")
+def _push_committed(session):
+    for activity in session.info.pop(PENDING_KEY, ()):
+        push(activity)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def push(activity: dict):
+    """Queue an event for the flusher; spills (or drops) it when the queue is full."""
+    if _stopping.is_set():
+        _write([activity])
+        return
+    _ensure_started()
+    try:
+        _queue.put_nowait(activity)
+        _count("queued")
+    except queue.Full:
+        _spill([activity])
+
+
+def _spill_path(pid: int | None = None) -> str:
+    return os.path.join(settings.ACTIVITY_SPILL_DIR, f"{SPILL_PREFIX}{pid or os.getpid()}.jsonl")
+
+
+def _spill(activities: list[dict]):
+    if not settings.ACTIVITY_SPILL_DIR:
+        _count("dropped", len(activities))
+        return
+    try:
+        with _lock:
+            os.makedirs(settings.ACTIVITY_SPILL_DIR, exist_ok=True)
+            with open(_spill_path(), "a", encoding="utf-8") as f:
+                for activity in activities:
+                    f.write(json.dumps(activity, default=str) + "\n")
+        _count("spilled", len(activities))
+    except OSError as e:
+        print(f"⚠ Could not spill {len(activities)} activity events: {e}")
+        _count("dropped", len(activities))
+
+
+def _insert(activities: list[dict]) -> bool:
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(UserActivity).values(activities))
+    except Exception as e:
+        print(f"⚠ Activity batch insert failed ({len(activities)} rows): {e}")
+        _count("failed_batches")
+        return False
+    _count("written", len(activities))
+    _count("batches")
+    return True
+
+
+def _write(activities: list[dict]):
+    if not _insert(activities):
+        _spill(activities)
+
+
+def _replay_spill():
+    """Insert this worker's spilled events, oldest first, once the queue has room again."""
+    path = _spill_path()
+    replaying = f"{path}.replay"
+    with _lock:
+        # A leftover .replay file is from an interrupted replay: finish that one first
+        if not os.path.exists(replaying):
+            if not os.path.exists(path):
+                return
+            os.replace(path, replaying)  # new spills go to a fresh file meanwhile
+    activities = []
+    with open(replaying, encoding="utf-8") as f:
+        for line in f:
+            try:
+                activities.append(json.loads(line))
+            except ValueError:
+                pass  # a line cut short by a crash mid-write
+    for start in range(0, len(activities), settings.ACTIVITY_FLUSH_BATCH):
+        batch = activities[start:start + settings.ACTIVITY_FLUSH_BATCH]
+        for activity in batch:
+            activity["created_at"] = datetime.fromisoformat(activity["created_at"])
+        if not _insert(batch):
+            # Put the rest back for the next idle cycle
+            _spill(activities[start:])
+            break
+        _count("replayed", len(batch))
+    os.remove(replaying)
+
+
+def _adopt_orphans():
+    """Take over spill files of worker processes that no longer exist."""
+    if not settings.ACTIVITY_SPILL_DIR:
+        return
+    for path in glob.glob(os.path.join(settings.ACTIVITY_SPILL_DIR, f"{SPILL_PREFIX}*.jsonl*")):
+        pid = os.path.basename(path)[len(SPILL_PREFIX):].split(".")[0]
+        if not pid.isdigit() or int(pid) == os.getpid() or _is_alive(int(pid)):
+            continue
+        # Claim it first with an atomic rename to a name carrying our pid: workers start together,
+        # and only the one whose rename succeeds reads it (the others get FileNotFoundError)
+        claimed = f"{_spill_path()}.adopt-{os.path.basename(path)}"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            continue
+        try:
+            with open(claimed, encoding="utf-8") as f:
+                lines = f.read()
+            with _lock, open(_spill_path(), "a", encoding="utf-8") as f:
+                f.write(lines)
+            os.remove(claimed)
+        except OSError as e:
+            print(f"⚠ Could not adopt activity spill file {path}: {e}")
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _run():
+    interval = settings.ACTIVITY_FLUSH_INTERVAL_MS / 1000
+    while not (_stopping.is_set() and _queue.empty()):
+        batch = []
+        deadline = time.monotonic() + interval
+        while len(batch) < settings.ACTIVITY_FLUSH_BATCH:
+            try:
+                batch.append(_queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        if batch:
+            _write(batch)
+        elif settings.ACTIVITY_SPILL_DIR and not _stopping.is_set():
+            try:
+                _replay_spill()
+            except Exception as e:
+                print(f"⚠ Activity spill replay failed: {e}")
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None or _stopping.is_set():
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="activity-sink", daemon=True)
+            _thread.start()
+
+
+def start():
+    _adopt_orphans()
+    _ensure_started()
+
+
+def stop(timeout: float = 10):
+    """Flush what is queued. Events pushed afterwards are written inline."""
+    global _thread
+    _stopping.set()
+    thread = _thread
+    if thread is not None:
+        thread.join(timeout)
+        _thread = None
+    leftover = []
+    while not _queue.empty():
+        leftover.append(_queue.get_nowait())
+    if leftover:
+        _write(leftover)
+
+
+def get_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    return {**stats, "pending": _queue.qsize(), "running": _thread is not None and _thread.is_alive()}
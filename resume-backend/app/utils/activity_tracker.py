@@ -1,31 +1,66 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.metrics import UserMetrics
 from app.models.activity import UserActivity
+from app.core.config import settings
+from app.core.database import engine
+from app.utils import activity_sink
+
+# These helpers never commit; their writes are committed with the rest of the
+# request by get_db / get_async_db (or by the caller's own commit outside a
+# request). Activity rows go through the write-behind activity_sink once that
+# commit happens.
+
+def _increment_metric(user_id: int, feature_name: str):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE count = count + 1 (ON CONFLICT on SQLite / PostgreSQL):
+    one atomic statement on the (user_id, feature_name) key, so concurrent requests can't lose an increment.
+    """
+    values = {"user_id": user_id, "feature_name": feature_name, "count": 1}
+    increment = {"count": UserMetrics.count + 1, "updated_at": func.now()}
+    if engine.dialect.name == "mysql":
+        return mysql_insert(UserMetrics).values(**values).on_duplicate_key_update(**increment)
+    dialect_insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    return dialect_insert(UserMetrics).values(**values).on_conflict_do_update(
+        index_elements=["user_id", "feature_name"], set_=increment,
+    )
+
 
 def track_activity(db: Session, user_id: int, activity_type: str):
     """
     Increment or create user activity counter.
     """
-    existing = db.query(UserMetrics).filter_by(user_id=user_id, feature_name=activity_type).first()
-    if existing:
-        existing.count += 1
-    else:
-        existing = UserMetrics(user_id=user_id, feature_name=activity_type, count=1)
-        db.add(existing)
-    db.commit()
-    db.refresh(existing)
-    return existing
+    db.execute(_increment_metric(user_id, activity_type))
 
-def log_user_activity(db: Session, user_id: int, action: str, meta_data: dict = None):
+
+def get_metric_count(db: Session, user_id: int, feature_name: str) -> int:
+    """
+    Current counter value, 0 if the feature was never used. One lookup on the unique key, no write.
+    """
+    return db.scalar(
+        select(UserMetrics.count).where(UserMetrics.user_id == user_id, UserMetrics.feature_name == feature_name)
+    ) or 0
+
+def log_user_activity(db: Session | AsyncSession, user_id: int, action: str, meta_data: dict = None):
     """
     Logs a user activity into the database.
+    Only stages the row (or the sink event), so it works the same with a sync or an async session.
 
     Args:
-        db (Session): SQLAlchemy session object.
+        db (Session | AsyncSession): SQLAlchemy session object.
         user_id (int): The ID of the user performing the action.
         action (str): A short description of the user action.
         meta_data (dict, optional): Additional metadata related to the action.
     """
+    if settings.ACTIVITY_SINK_ENABLED:
+        activity = activity_sink.make_event(user_id, action, meta_data)
+        activity_sink.stage(db, activity)
+        return activity
+
     activity = UserActivity(
         user_id=user_id,
         action=action,
@@ -33,6 +68,11 @@ def log_user_activity(db: Session, user_id: int, action: str, meta_data: dict =
     )
 
     db.add(activity)
-    db.commit()
-    db.refresh(activity)
-    return activity
\ No newline at end of file
+    return activity
+
+
+async def track_activity_async(db: AsyncSession, user_id: int, activity_type: str):
+    """
+    track_activity for async routes.
+    """
+    await db.execute(_increment_metric(user_id, activity_type))
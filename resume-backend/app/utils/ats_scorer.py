@@ -0,0 +1,192 @@
+"""
+Deterministic ATS sub-scores computed locally from extracted resume text.
+
+Runs in a few milliseconds, so /ats/check can return scores before Gemini
+answers, and still score a resume when Gemini is down or over quota.
+"""
+import re
+
+from app.utils.skill_taxonomy import find_skill_mentions
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_RE = re.compile(r"(?:\+?\d[\s().-]?){9,14}\d")
+PROFILE_URL_RE = re.compile(r"(linkedin\.com/|github\.com/|gitlab\.com/|behance\.net/|https?://)", re.I)
+YEAR_RE = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+DATE_RANGE_RE = re.compile(
+    r"(\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?\b(19|20)\d{2}\s*(?:-|–|—|to)\s*"
+    r"((?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?((19|20)\d{2}|present|current|now)\b",
+    re.I,
+)
+METRIC_RE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:%|percent|x\b|k\b|m\b|\+)|[$₹€£]\s?\d", re.I)
+BULLET_RE = re.compile(r"^\s*(?:[-•▪●◦*·]|\d+[.)])\s+", re.M)
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z+#.]*")
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me", "professional summary"),
+    "experience": ("experience", "employment", "work history", "professional experience", "career history"),
+    "education": ("education", "academic", "qualifications"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tools"),
+    "projects": ("projects", "personal projects", "key projects"),
+    "certifications": ("certifications", "certificates", "licenses"),
+}
+
+DEGREE_TERMS = (
+    "bachelor", "master", "phd", "ph.d", "doctorate", "diploma", "degree", "b.sc", "m.sc", "bsc", "msc",
+    "b.tech", "m.tech", "btech", "mtech", "b.e", "m.e", "mba", "bca", "mca", "b.com", "m.com", "university",
+    "college", "institute", "school of",
+)
+
+ACTION_VERBS = (
+    "achieved", "built", "created", "delivered", "designed", "developed", "drove", "implemented", "improved",
+    "increased", "launched", "led", "managed", "mentored", "optimized", "owned", "reduced", "resolved",
+    "scaled", "shipped", "streamlined", "automated", "architected", "coordinated", "established", "migrated",
+    "negotiated", "organized", "spearheaded", "supervised", "trained", "analyzed", "collaborated",
+)
+
+# Weights used to fold the sub-scores into "overall"
+WEIGHTS = {
+    "formatting": 0.15,
+    "keywords": 0.20,
+    "experience": 0.25,
+    "education": 0.10,
+    "skills": 0.20,
+    "contact": 0.10,
+}
+
+
+def _clamp(value: float) -> int:
+    return int(max(0, min(100, round(value))))
+
+
+def find_sections(text: str) -> set[str]:
+    """Names of the standard sections whose heading appears on a line of its own."""
+    found = set()
+    for line in text.splitlines():
+        heading = line.strip().strip(":").lower()
+        if not heading or len(heading) > 40:
+            continue
+        for section, names in SECTION_HEADINGS.items():
+            if heading in names:
+                found.add(section)
+    return found
+
+
+def _compile_terms(terms) -> re.Pattern:
+    # One alternation per vocabulary, longest terms first, so the text is scanned once
+    alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<![\w])(?:{alternation})(?![\w])")
+
+
+_DEGREE_PATTERN = _compile_terms(DEGREE_TERMS)
+_ACTION_VERB_PATTERN = _compile_terms(ACTION_VERBS)
+
+
+def _count_terms(lower_text: str, pattern: re.Pattern) -> int:
+    """Number of distinct vocabulary terms present in the text."""
+    return len(set(pattern.findall(lower_text)))
+
+
+def score_resume_text(text: str) -> dict:
+    """
+    Score extracted resume text.
+    Returns {"overall", "breakdown", "missingData"} in the same shape the Gemini analysis uses.
+    """
+    lower = text.lower()
+    lines = [l for l in text.splitlines() if l.strip()]
+    words = WORD_RE.findall(text)
+    word_count = len(words)
+    sections = find_sections(text)
+    missing = {"Contact": [], "Experience": [], "Education": [], "Skills": [], "Formatting": [], "Keywords": []}
+
+    # Contact
+    has_email = bool(EMAIL_RE.search(text))
+    has_phone = bool(PHONE_RE.search(text))
+    has_profile = bool(PROFILE_URL_RE.search(text))
+    contact = 45 * has_email + 35 * has_phone + 20 * has_profile
+    if not has_email:
+        missing["Contact"].append("No email address found")
+    if not has_phone:
+        missing["Contact"].append("No phone number found")
+    if not has_profile:
+        missing["Contact"].append("No LinkedIn / GitHub / portfolio link found")
+
+    # Experience
+    date_ranges = len(DATE_RANGE_RE.findall(text))
+    action_verbs = _count_terms(lower, _ACTION_VERB_PATTERN)
+    metrics = len(METRIC_RE.findall(text))
+    experience = (
+        30 * ("experience" in sections)
+        + min(date_ranges, 4) * 10
+        + min(action_verbs, 6) * 3
+        + min(metrics, 4) * 3
+    )
+    if "experience" not in sections:
+        missing["Experience"].append("No clearly labelled Experience section")
+    if date_ranges == 0:
+        missing["Experience"].append("No employment dates found")
+    if metrics == 0:
+        missing["Experience"].append("No quantified achievements (numbers, %, revenue)")
+
+    # Education
+    degree_terms = _count_terms(lower, _DEGREE_PATTERN)
+    education = 40 * ("education" in sections) + min(degree_terms, 2) * 20 + 20 * bool(YEAR_RE.search(text))
+    if "education" not in sections:
+        missing["Education"].append("No clearly labelled Education section")
+    if degree_terms == 0:
+        missing["Education"].append("No degree or institution found")
+
+    # Skills
+    skill_hits = len(set(find_skill_mentions(lower)))
+    skills = 40 * ("skills" in sections) + min(skill_hits, 12) * 5
+    if "skills" not in sections:
+        missing["Skills"].append("No clearly labelled Skills section")
+    if skill_hits < 5:
+        missing["Skills"].append("Few recognisable skills or tools listed")
+
+    # Keywords: distinct recognised terms relative to resume length
+    distinct_terms = skill_hits + action_verbs
+    density = distinct_terms / max(word_count / 100, 1)
+    keywords = min(distinct_terms, 20) * 3.5 + min(density, 6) * 5
+    if distinct_terms < 8:
+        missing["Keywords"].append("Add role-specific keywords and action verbs")
+
+    # Formatting
+    bullets = len(BULLET_RE.findall(text))
+    long_lines = sum(1 for l in lines if len(l) > 200)
+    odd_chars = sum(1 for ch in text if ord(ch) > 0x2FFF) / max(len(text), 1)
+    formatting = 100
+    if word_count < 200:
+        formatting -= 30
+        missing["Formatting"].append("Resume is very short")
+    elif word_count > 1200:
+        formatting -= 20
+        missing["Formatting"].append("Resume is longer than two pages of text")
+    if bullets == 0:
+        formatting -= 15
+        missing["Formatting"].append("No bullet points found")
+    if len(sections) < 3:
+        formatting -= 20
+        missing["Formatting"].append("Fewer than three standard section headings")
+    formatting -= min(long_lines, 5) * 4
+    if odd_chars > 0.01:
+        formatting -= 15
+        missing["Formatting"].append("Unusual characters or icons that ATS parsers may not read")
+
+    breakdown = {
+        "formatting": _clamp(formatting),
+        "keywords": _clamp(keywords),
+        "experience": _clamp(experience),
+        "education": _clamp(education),
+        "skills": _clamp(skills),
+        "contact": _clamp(contact),
+    }
+    overall = _clamp(sum(breakdown[k] * w for k, w in WEIGHTS.items()))
+
+    severity = {"Contact": "critical", "Experience": "critical", "Education": "warning",
+                "Skills": "warning", "Formatting": "info", "Keywords": "info"}
+    missing_data = [
+        {"category": category, "items": items, "severity": severity[category]}
+        for category, items in missing.items()
+        if items
+    ]
+    return {"overall": overall, "breakdown": breakdown, "missingData": missing_data}
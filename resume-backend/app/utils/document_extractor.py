@@ -0,0 +1,317 @@
+"""
+Text extraction for uploaded resumes and job descriptions (PDF, DOCX, plain text).
+
+- uploads are copied in chunks into memory up to UPLOAD_SPOOL_MAX_MEMORY,
+  then into a named temp file, and rejected with 413 past UPLOAD_MAX_BYTES;
+  PDF extraction (threads and worker processes) opens that file by path, so
+  large uploads are never read back into memory or pickled to the workers
+- PDFs with more than DOCUMENT_MAX_PAGES pages are rejected
+- PDFs with at least DOCUMENT_PARALLEL_MIN_PAGES pages are split into page
+  ranges extracted in parallel by DOCUMENT_EXTRACT_WORKERS processes;
+  smaller documents are extracted on a thread
+- the result is normalized text plus the offset where each page starts, so
+  prompt building can cut at a page boundary (see truncate_pages), and the
+  lines with their font size / bold flag for layout-aware parsing
+  (see resume_sections)
+- uploads are hashed while they stream in; results are cached per worker
+  under that SHA-256 (LRU, DOCUMENT_CACHE_MAX_BYTES of text), so re-uploading
+  the same file skips parsing. The digest is returned as "sha256" for use as
+  a cache key further down (e.g. the LLM response cache)
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import re
+import tempfile
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO
+
+import fitz  # PyMuPDF
+from cachetools import LRUCache
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+
+READ_CHUNK_SIZE = 64 * 1024
+PAGE_SEPARATOR = "\n\n"
+
+PDF_TYPES = ("application/pdf",)
+DOCX_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+)
+
+CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+SPACES_RE = re.compile(r"[ \t]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# get_text("dict") without image blocks (their pixel data is large and unused)
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _cached_size(document: dict) -> int:
+    # Roughly the bytes held: the text twice (once in "lines"), plus per-line and per-page overhead
+    return 2 * len(document["text"]) + 32 * len(document["lines"]) + 8 * len(document["page_offsets"])
+
+
+_cache = LRUCache(maxsize=settings.DOCUMENT_CACHE_MAX_BYTES, getsizeof=_cached_size)
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def detect_kind(file: UploadFile) -> str:
+    """"pdf", "docx" or "text", from the content type or the file extension."""
+    filename = (file.filename or "").lower()
+    if file.content_type in PDF_TYPES or filename.endswith(".pdf"):
+        return "pdf"
+    if file.content_type in DOCX_TYPES or filename.endswith((".doc", ".docx")):
+        return "docx"
+    return "text"
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)  # ligatures and full-width forms from PDF fonts
+    text = CONTROL_RE.sub("", text.replace("\r\n", "\n").replace("\r", "\n"))
+    lines = [SPACES_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _join_pages(pages: list[list[tuple]]) -> dict:
+    """
+    pages: per page, its lines as (text, font_size, bold); font_size is None
+    when the format has no layout, and an empty line separates blocks.
+    """
+    text_parts, page_offsets, lines = [], [], []
+    offset = 0
+    for page_index, page in enumerate(pages):
+        page_text = normalize_text("\n".join(text for text, _, _ in page))
+        if text_parts:
+            offset += len(PAGE_SEPARATOR)
+        page_offsets.append(offset)
+        text_parts.append(page_text)
+        offset += len(page_text)
+        for text, font_size, bold in page:
+            text = normalize_text(text)
+            if text:
+                lines.append([page_index, text, font_size, bold])
+    return {
+        "text": PAGE_SEPARATOR.join(text_parts),
+        "page_offsets": page_offsets,
+        "pages": len(pages),
+        "lines": lines,  # [page, text, font_size, bold]
+    }
+
+
+def truncate_pages(document: dict, max_chars: int) -> str:
+    """
+    The document text cut to at most max_chars, at the last page boundary
+    that fits; if even the first page is too long, at its last line break.
+    """
+    text = document["text"]
+    if len(text) <= max_chars:
+        return text
+    fitting = [offset for offset in document["page_offsets"] if 0 < offset <= max_chars]
+    if fitting:
+        return text[:fitting[-1]].rstrip()
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip()
+
+
+async def spool_upload(file: UploadFile) -> tuple[BinaryIO, str]:
+    """
+    Copy the upload into memory, or a named temp file once it passes UPLOAD_SPOOL_MAX_MEMORY,
+    enforcing UPLOAD_MAX_BYTES while reading.
+    Returns the file (rewound; deleted on close) and the SHA-256 hex digest of its content.
+    """
+    spooled = io.BytesIO()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.UPLOAD_MAX_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File is too large (max {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB).",
+                )
+            digest.update(chunk)
+            if isinstance(spooled, io.BytesIO) and size > settings.UPLOAD_SPOOL_MAX_MEMORY:
+                # Named, unlike SpooledTemporaryFile's rollover file, so other processes can open it
+                on_disk = tempfile.NamedTemporaryFile(prefix="upload-")
+                on_disk.write(spooled.getbuffer())
+                spooled = on_disk
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    finally:
+        await file.close()
+    spooled.flush()
+    spooled.seek(0)
+    return spooled, digest.hexdigest()
+
+
+def _cache_lookup(key: str) -> dict | None:
+    with _cache_lock:
+        document = _cache.get(key)
+        _cache_stats["hits" if document is not None else "misses"] += 1
+        return document
+
+
+def _cache_store(key: str, document: dict):
+    with _cache_lock:
+        if _cached_size(document) <= _cache.maxsize:
+            _cache[key] = document
+
+
+def get_cache_stats() -> dict:
+    with _cache_lock:
+        return {**_cache_stats, "entries": len(_cache), "bytes": _cache.currsize}
+
+
+def _page_lines(page) -> list[tuple]:
+    lines = []
+    for block in page.get_text("dict", flags=TEXT_FLAGS)["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            lines.append((
+                "".join(span["text"] for span in line["spans"]),
+                round(max(span["size"] for span in spans), 1),
+                all(span["flags"] & fitz.TEXT_FONT_BOLD for span in spans),
+            ))
+        lines.append(("", None, False))
+    return lines
+
+
+def _open_pdf(source: str | bytes):
+    """source: a file path (uploads spooled to disk) or the bytes of a small upload."""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _extract_page_range(source: str | bytes, start: int, stop: int) -> list[list[tuple]]:
+    """Runs in a worker process (or a thread for small documents)."""
+    with _open_pdf(source) as doc:
+        return [_page_lines(doc[i]) for i in range(start, stop)]
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.DOCUMENT_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _count_pages(source: str | bytes) -> int:
+    with _open_pdf(source) as doc:
+        return doc.page_count
+
+
+async def _extract_pdf(source: str | bytes) -> list[list[tuple]]:
+    global _executor
+    try:
+        page_count = await asyncio.to_thread(_count_pages, source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read PDF file: {str(e)}")
+    if page_count > settings.DOCUMENT_MAX_PAGES:
+        raise HTTPException(status_code=400, detail=f"PDF has too many pages (max {settings.DOCUMENT_MAX_PAGES}).")
+
+    workers = settings.DOCUMENT_EXTRACT_WORKERS
+    if workers <= 0 or page_count < settings.DOCUMENT_PARALLEL_MIN_PAGES:
+        try:
+            return await asyncio.to_thread(_extract_page_range, source, 0, page_count)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to read PDF file: {str(e)}")
+
+    # One contiguous page range per worker; each worker opens its own copy of the document
+    step = -(-page_count // workers)
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    try:
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(executor, _extract_page_range, source, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ))
+    except BrokenProcessPool:
+        print("⚠ Document extraction pool broken, restarting it")
+        if _executor is executor:
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(status_code=503, detail="Document extraction restarted, please try again.")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read PDF file: {str(e)}")
+    return [page for chunk in chunks for page in chunk]
+
+
+def _extract_docx(spooled) -> list[list[tuple]]:
+    from docx import Document
+
+    doc = Document(spooled)
+    lines = []
+    for paragraph in doc.paragraphs:
+        runs = [run for run in paragraph.runs if run.text.strip()]
+        # Word has no reliable font size per line; a heading style or an all-bold paragraph counts as bold
+        bold = paragraph.style.name.lower().startswith(("heading", "title")) or (
+            bool(runs) and all(run.bold for run in runs)
+        )
+        lines.extend((text, None, bold) for text in paragraph.text.split("\n"))
+    return [lines]
+
+
+async def extract_upload(file: UploadFile, kinds: tuple[str, ...] = ("pdf", "docx", "text")) -> dict:
+    """
+    Extract an uploaded document.
+    Returns {"text", "page_offsets", "pages", "lines", "kind", "sha256"};
+    DOCX and plain text count as one page.
+    """
+    kind = detect_kind(file)
+    if kind not in kinds:
+        raise HTTPException(status_code=400, detail=f"Only PDF or DOCX files are supported ({file.filename}).")
+
+    spooled, sha256 = await spool_upload(file)
+    # The kind is part of the key: the same bytes uploaded as .txt and .pdf extract differently
+    cache_key = f"{kind}:{sha256}"
+    cached = _cache_lookup(cache_key)
+    if cached is not None:
+        spooled.close()
+        return {**cached, "kind": kind, "sha256": sha256}
+
+    try:
+        if kind == "pdf":
+            # In memory: at most UPLOAD_SPOOL_MAX_MEMORY bytes, cheap to hand over as is
+            pages = await _extract_pdf(spooled.getvalue() if isinstance(spooled, io.BytesIO) else spooled.name)
+        elif kind == "docx":
+            try:
+                pages = await asyncio.to_thread(_extract_docx, spooled)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Failed to read DOCX file: {str(e)}")
+        else:
+            text = (await asyncio.to_thread(spooled.read)).decode("utf-8", errors="ignore")
+            pages = [[(line, None, False) for line in text.splitlines()]]
+    finally:
+        spooled.close()
+
+    document = _join_pages(pages)
+    _cache_store(cache_key, document)
+    return {**document, "kind": kind, "sha256": sha256}
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
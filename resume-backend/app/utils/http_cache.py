@@ -0,0 +1,111 @@
+"""
+Conditional and range-capable responses for generated files held in memory.
+
+- ETag from the content hash; If-None-Match -> 304 (GET/HEAD only)
+- Cache-Control: private, revalidated on every use, so browsers keep the
+  file and only re-download it when it actually changed
+- Range: bytes=a-b -> 206 with Content-Range (single ranges; If-Range honoured)
+- the body is streamed in chunks instead of sent as one buffer
+- other methods (POST) get the streamed body only: nothing ever revalidates
+  a POST, so they carry no ETag or Accept-Ranges
+"""
+import hashlib
+import re
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def make_etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return etag in tags
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the whole body.
+    Raises ValueError for a range that can't be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None  # multi-range or malformed: ignoring Range is always allowed
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def requested_range_start(request: Request) -> int:
+    """Offset the client asked to start from (0 for a full download)."""
+    match = RANGE_RE.match((request.headers.get("range") or "").strip())
+    return int(match.group(1)) if match and match.group(1) else 0
+
+
+def is_not_modified(request: Request, content: bytes) -> bool:
+    """True when file_response will answer 304: the client already has this exact file."""
+    return request.method in ("GET", "HEAD") and _etag_matches(request.headers.get("if-none-match"), make_etag(content))
+
+
+def _iter_chunks(view: memoryview):
+    for offset in range(0, len(view), CHUNK_SIZE):
+        yield bytes(view[offset:offset + CHUNK_SIZE])
+
+
+def file_response(request: Request, content: bytes, media_type: str, headers: dict | None = None) -> Response:
+    size = len(content)
+    conditional = request.method in ("GET", "HEAD")
+    if not conditional:
+        return StreamingResponse(
+            _iter_chunks(memoryview(content)), media_type=media_type,
+            headers={**(headers or {}), "Content-Length": str(size)},
+        )
+
+    etag = make_etag(content)
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+
+    if is_not_modified(request, content):
+        return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "Cache-Control")})
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", **headers})
+
+    view = memoryview(content)
+    if byte_range is None:
+        return StreamingResponse(
+            _iter_chunks(view), media_type=media_type,
+            headers={**headers, "Content-Length": str(size)},
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        _iter_chunks(view[start:end + 1]), status_code=206, media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)},
+    )
@@ -0,0 +1,163 @@
+"""
+Rank many job descriptions against one resume, locally.
+
+Each JD gets two scores, both computed for the whole batch at once with NumPy:
+- skill coverage: weighted share of the JD's taxonomy skills the resume has
+- text similarity: TF-IDF cosine between JD and resume words, with IDF taken
+  from the batch itself
+
+The batch is tokenized once. Skills are found by looking up token n-grams
+against the taxonomy aliases, and the document-term matrix is never
+materialised: (doc, term) pairs are reduced with bincount, so a 1,000-JD
+batch stays well under a second.
+"""
+import re
+
+import numpy as np
+
+from app.utils.skill_matcher import resume_free_text, resume_skill_names
+from app.utils.skill_taxonomy import (
+    ALIASES,
+    CANONICAL_SKILLS,
+    SKILL_INDEX,
+    SKILL_WEIGHTS,
+    TEXT_ALIASES,
+    find_skill_mentions,
+    normalize_skill,
+)
+
+_WEIGHTS = np.asarray(SKILL_WEIGHTS, dtype=np.float64)
+_VOCAB_SIZE = len(CANONICAL_SKILLS)
+
+TOKEN_RE = re.compile(r"\.?[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+
+# alias as a token tuple -> skill index, e.g. ("machine", "learning") -> index of "machine learning"
+ALIAS_NGRAMS = {tuple(TOKEN_RE.findall(alias)): SKILL_INDEX[ALIASES[alias]] for alias in TEXT_ALIASES}
+MAX_ALIAS_TOKENS = max(len(ngram) for ngram in ALIAS_NGRAMS)
+
+# Weights folding the two local scores into match_score
+RANK_WEIGHTS = {"skill_coverage": 0.7, "text_similarity": 0.3}
+
+
+def _tokenize(texts: list[str]) -> tuple[dict[str, int], np.ndarray, np.ndarray]:
+    """Batch vocabulary plus the doc id and term id of every token, in order."""
+    vocab: dict[str, int] = {}
+    doc_ids, term_ids = [], []
+    for doc, text in enumerate(texts):
+        tokens = TOKEN_RE.findall(text)
+        doc_ids.append(np.full(len(tokens), doc, dtype=np.int64))
+        term_ids.append(np.fromiter((vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int64, count=len(tokens)))
+    return vocab, np.concatenate(doc_ids), np.concatenate(term_ids)
+
+
+def _skill_matrix(n_docs: int, vocab: dict[str, int], docs: np.ndarray, terms: np.ndarray) -> np.ndarray:
+    """(n_docs, n_skills) weighted, log-scaled skill mention counts."""
+    n_terms = max(len(vocab), 1)
+    n_tokens = len(terms)
+    covered = np.zeros(n_tokens, dtype=bool)
+    hit_docs, hit_skills = [], []
+    # Longest aliases first; tokens they cover can't also count for a shorter alias ("sql server" vs "sql")
+    for n in range(MAX_ALIAS_TOKENS, 0, -1):
+        # Encode each alias n-gram made of known words as one integer, then test every n-gram in the batch
+        table = {}
+        for ngram, skill in ALIAS_NGRAMS.items():
+            if len(ngram) == n and all(t in vocab for t in ngram):
+                code = 0
+                for t in ngram:
+                    code = code * n_terms + vocab[t]
+                table[code] = skill
+        if not table or n_tokens < n:
+            continue
+
+        codes = terms[:n_tokens - n + 1].copy()
+        for k in range(1, n):
+            codes = codes * n_terms + terms[k:n_tokens - n + 1 + k]
+
+        alias_codes = np.fromiter(table, dtype=np.int64)
+        alias_skills = np.fromiter(table.values(), dtype=np.int64)
+        order = np.argsort(alias_codes)
+        alias_codes, alias_skills = alias_codes[order], alias_skills[order]
+
+        hits = np.flatnonzero(np.isin(codes, alias_codes))
+        covered_sum = np.concatenate(([0], np.cumsum(covered)))
+        hits = hits[(docs[hits] == docs[hits + n - 1]) & (covered_sum[hits + n] == covered_sum[hits])]
+        for k in range(n):
+            covered[hits + k] = True
+
+        hit_docs.append(docs[hits])
+        hit_skills.append(alias_skills[np.searchsorted(alias_codes, codes[hits])])
+
+    counts = np.zeros(n_docs * _VOCAB_SIZE)
+    if hit_docs:
+        counts = np.bincount(np.concatenate(hit_docs) * _VOCAB_SIZE + np.concatenate(hit_skills),
+                             minlength=n_docs * _VOCAB_SIZE).astype(np.float64)
+    return np.log1p(counts.reshape(n_docs, _VOCAB_SIZE)) * _WEIGHTS
+
+
+def _text_similarity(n_docs: int, vocab: dict[str, int], docs: np.ndarray, terms: np.ndarray,
+                     resume_text: str) -> np.ndarray:
+    """TF-IDF cosine of every JD against the resume, shape (n_docs,)."""
+    n_terms = len(vocab)
+    if not n_terms:
+        return np.zeros(n_docs)
+
+    # Unique (doc, term) pairs and their counts
+    pairs, tf = np.unique(docs * n_terms + terms, return_counts=True)
+    pair_doc, pair_term = np.divmod(pairs, n_terms)
+
+    df = np.bincount(pair_term, minlength=n_terms)
+    idf = np.log((n_docs + 1) / (df + 1)) + 1
+
+    # Resume vector over the batch vocabulary; words no JD uses can't contribute
+    resume_ids = [vocab[t] for t in TOKEN_RE.findall(resume_text) if t in vocab]
+    resume_vec = np.log1p(np.bincount(np.asarray(resume_ids, dtype=np.intp), minlength=n_terms)) * idf
+    resume_norm = np.linalg.norm(resume_vec)
+    if not resume_norm:
+        return np.zeros(n_docs)
+
+    weights = np.log1p(tf) * idf[pair_term]
+    dots = np.bincount(pair_doc, weights=weights * resume_vec[pair_term], minlength=n_docs)
+    norms = np.sqrt(np.bincount(pair_doc, weights=weights ** 2, minlength=n_docs))
+    return np.divide(dots, norms * resume_norm, out=np.zeros(n_docs), where=norms > 0)
+
+
+def rank_job_descriptions(jd_texts: list[str], resume_data: dict) -> list[dict]:
+    """
+    Score every JD against the stored resume JSON.
+    Returns one entry per JD, best match first: index (position in the input),
+    match_score, skill_coverage, text_similarity, matched_skills, missing_skills.
+    """
+    if not jd_texts:
+        return []
+    resume_data = resume_data or {}
+    n_docs = len(jd_texts)
+    vocab, docs, terms = _tokenize([(t or "").lower() for t in jd_texts])
+
+    declared = [normalize_skill(s) for s in resume_skill_names(resume_data)]
+    free_text = resume_free_text(resume_data)
+    resume_skills = np.zeros(_VOCAB_SIZE, dtype=bool)
+    resume_skills[[SKILL_INDEX[s] for s in declared + find_skill_mentions(free_text) if s in SKILL_INDEX]] = True
+
+    jd_skills = _skill_matrix(n_docs, vocab, docs, terms)
+    required = jd_skills > 0
+    matched = required & resume_skills
+    required_weight = (required * _WEIGHTS).sum(axis=1)
+    coverage = np.divide((matched * _WEIGHTS).sum(axis=1), required_weight,
+                         out=np.zeros(n_docs), where=required_weight > 0)
+
+    similarity = _text_similarity(n_docs, vocab, docs, terms, " ".join(declared) + "\n" + free_text.lower())
+    scores = RANK_WEIGHTS["skill_coverage"] * coverage + RANK_WEIGHTS["text_similarity"] * similarity
+
+    ranked = []
+    for i in np.argsort(-scores, kind="stable"):
+        missing = np.flatnonzero(required[i] & ~matched[i])
+        missing = missing[np.argsort(-jd_skills[i, missing], kind="stable")]
+        ranked.append({
+            "index": int(i),
+            "match_score": int(round(scores[i] * 100)),
+            "skill_coverage": int(round(coverage[i] * 100)),
+            "text_similarity": int(round(similarity[i] * 100)),
+            "matched_skills": [CANONICAL_SKILLS[j] for j in np.flatnonzero(matched[i])],
+            "missing_skills": [CANONICAL_SKILLS[j] for j in missing],
+        })
+    return ranked
@@ -0,0 +1,158 @@
+"""
+Two-tier cache for rendered resume PDFs.
+
+Keys are built from the user, the template (name + file version) and a hash
+of resume_data, so an edit to either the resume or the template can never
+serve a stale PDF. invalidate_user() only frees the space of PDFs that can
+no longer be hit.
+
+- memory: per-process LRU bounded by total bytes
+- disk: files under PDF_CACHE_DIR shared by every worker, oldest-used
+  evicted once the directory grows past PDF_CACHE_DISK_MAX_BYTES
+
+lookup/store/invalidate_user touch the disk; async code calls the *_async
+variants, which run that part in a thread.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+
+from cachetools import LRUCache
+
+from app.core.config import settings
+
+_memory = LRUCache(maxsize=settings.PDF_CACHE_MAX_BYTES, getsizeof=len)
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def make_key(user_id: int, template_name: str, template_version: str, resume_data: dict) -> str:
+    payload = json.dumps(
+        [template_name, template_version, resume_data],
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return f"{user_id}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _disk_path(key: str) -> str:
+    return os.path.join(settings.PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def _lookup_memory(key: str) -> bytes | None:
+    with _lock:
+        pdf = _memory.get(key)
+        if pdf is not None:
+            _stats["memory_hits"] += 1
+        return pdf
+
+
+def lookup(key: str) -> bytes | None:
+    pdf = _lookup_memory(key)
+    if pdf is not None:
+        return pdf
+    return _lookup_disk(key)
+
+
+async def lookup_async(key: str) -> bytes | None:
+    pdf = _lookup_memory(key)
+    if pdf is not None:
+        return pdf  # memory hits skip the thread hop
+    return await asyncio.to_thread(_lookup_disk, key)
+
+
+def _lookup_disk(key: str) -> bytes | None:
+    path = _disk_path(key)
+    try:
+        with open(path, "rb") as f:
+            pdf = f.read()
+        os.utime(path)  # mtime doubles as last-used time for eviction
+    except FileNotFoundError:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    except OSError as e:
+        print(f"⚠ PDF cache read failed: {e}")
+        return None
+
+    with _lock:
+        _stats["disk_hits"] += 1
+        _memory[key] = pdf
+    return pdf
+
+
+def store(key: str, pdf: bytes):
+    with _lock:
+        if len(pdf) <= _memory.maxsize:
+            _memory[key] = pdf
+
+    if settings.PDF_CACHE_DISK_MAX_BYTES <= 0 or len(pdf) > settings.PDF_CACHE_DISK_MAX_BYTES:
+        return
+    try:
+        os.makedirs(settings.PDF_CACHE_DIR, exist_ok=True)
+        path = _disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)  # atomic, so readers in other workers never see a partial file
+        _evict_disk()
+    except OSError as e:
+        print(f"⚠ PDF cache write failed: {e}")
+
+
+async def store_async(key: str, pdf: bytes):
+    await asyncio.to_thread(store, key, pdf)
+
+
+def _evict_disk():
+    entries = []
+    total = 0
+    with os.scandir(settings.PDF_CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith(".pdf"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # evicted by another worker meanwhile
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= settings.PDF_CACHE_DISK_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def invalidate_user(user_id: int):
+    """Drop every cached PDF of a user (called when their resume_data is rewritten)."""
+    prefix = f"{user_id}-"
+    with _lock:
+        for key in [k for k in _memory if k.startswith(prefix)]:
+            del _memory[key]
+
+    try:
+        with os.scandir(settings.PDF_CACHE_DIR) as it:
+            paths = [e.path for e in it if e.name.startswith(prefix) and e.name.endswith(".pdf")]
+    except FileNotFoundError:
+        return
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def invalidate_user_async(user_id: int):
+    await asyncio.to_thread(invalidate_user, user_id)
+
+
+def get_stats() -> dict:
+    with _lock:
+        return {**_stats, "memory_entries": len(_memory), "memory_bytes": _memory.currsize}
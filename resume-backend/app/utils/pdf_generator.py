@@ -8,8 +8,134 @@
 #     """Convert HTML content to PDF bytes."""
 #     return pdfkit.from_string(html, False, configuration=config)
 
-from weasyprint import HTML
+import glob
+import hashlib
+import os
+import re
+import time
+
+from weasyprint import CSS, HTML
+from weasyprint.css.media_queries import evaluate_media_query
+from weasyprint.text.fonts import FontConfiguration
+
+TEMPLATES_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "../templates"))
+STYLE_RE = re.compile(r"<style\b([^>]*)>(.*?)</style>", re.S | re.I)
+# Documents whose cascade would change if their <style> blocks became user stylesheets
+# (see _hoist_styles); those are rendered as they are
+KEEP_INLINE_RE = re.compile(
+    r"<link\b[^>]*stylesheet|style\s*=\s*(\"[^\"]*|'[^']*)!\s*important|@counter-style|<!--(?:(?!-->).)*<style",
+    re.I | re.S,
+)
+
+# Fonts are subset to the glyphs used (WeasyPrint's default, kept explicit), images
+# are recompressed and downsampled to print resolution.
+PDF_OPTIONS = {
+    "full_fonts": False,
+    "optimize_images": True,
+    "jpeg_quality": 85,
+    "dpi": 150,
+}
+
+# Per process: parsed stylesheets keyed by a hash of their text, the font
+# configuration they were parsed against, and WeasyPrint's image cache.
+_font_config = FontConfiguration()
+_stylesheets: dict[str, CSS] = {}
+_image_cache: dict = {}
+
+
+def _stylesheet(css_text: str) -> CSS:
+    key = hashlib.sha1(css_text.encode("utf-8")).hexdigest()
+    sheet = _stylesheets.get(key)
+    if sheet is None:
+        sheet = CSS(string=css_text, font_config=_font_config)
+        _stylesheets[key] = sheet
+    return sheet
+
+
+def _attr(attrs: str, name: str) -> str | None:
+    match = re.search(rf"""\b{name}\s*=\s*["']?([^"'>]*)""", attrs, re.I)
+    return match.group(1).strip() if match else None
+
+
+def _hoist_styles(html: str) -> tuple[str, list[CSS]]:
+    """
+    Take the <style> blocks out of `html` as cached stylesheets, selected the
+    way WeasyPrint selects them (type text/css, media matching print).
+
+    write_pdf applies them with user origin instead of author. With no other
+    author CSS left in the document that only changes anything against an
+    inline style="... !important", or for @counter-style rules (parsed into
+    the sheet, not the document); such documents, and ones linking
+    stylesheets, are left untouched.
+    """
+    if KEEP_INLINE_RE.search(html):
+        return html, []
+    stylesheets = []
+
+    def hoist(match):
+        attrs, css = match.groups()
+        if (_attr(attrs, "type") or "text/css").split(";")[0].strip().lower() != "text/css":
+            return match.group(0)  # ignored by WeasyPrint either way
+        media = [m.strip() for m in (_attr(attrs, "media") or "all").split(",")]
+        if evaluate_media_query(media, "print"):
+            stylesheets.append(_stylesheet(css))
+        return ""
+
+    return STYLE_RE.sub(hoist, html), stylesheets
+
 
 def generate_pdf_from_html(html: str) -> bytes:
-    """Convert HTML content to PDF bytes using WeasyPrint."""
-    return HTML(string=html).write_pdf()
+    """
+    Convert HTML content to PDF bytes using WeasyPrint.
+    Inline <style> blocks are swapped for stylesheets parsed once per process,
+    since every render of a template carries the same CSS.
+    """
+    if len(_image_cache) > 128:
+        _image_cache.clear()  # keyed by image URL; profile photos would otherwise pile up
+    body, stylesheets = _hoist_styles(html)
+    return HTML(string=body).write_pdf(
+        stylesheets=stylesheets, font_config=_font_config, cache=_image_cache, **PDF_OPTIONS
+    )
+
+
+def generate_pdf_timed(html: str) -> tuple[bytes, float]:
+    """generate_pdf_from_html plus the render time in seconds, measured inside the worker."""
+    started = time.perf_counter()
+    pdf_bytes = generate_pdf_from_html(html)
+    return pdf_bytes, time.perf_counter() - started
+
+
+# Touches the font stack (fontconfig, default serif/sans faces) and the user-agent
+# stylesheet so the first real render in a fresh process doesn't pay for them.
+WARM_UP_HTML = """
+<html><head><style>
+  body { font-family: sans-serif; } h1 { font-family: serif; } code { font-family: monospace; }
+</style></head>
+<body><h1>Warm up</h1><p>Résumé <b>bold</b> <i>italic</i></p><ul><li>item</li></ul><code>x</code></body></html>
+"""
+
+
+def warm_up():
+    """
+    Render a throwaway document and pre-parse every template's stylesheet
+    (used as the PDF pool's worker initializer).
+    """
+    try:
+        generate_pdf_from_html(WARM_UP_HTML)
+        for path in glob.glob(os.path.join(TEMPLATES_ROOT, "resumes", "*.html")) + \
+                glob.glob(os.path.join(TEMPLATES_ROOT, "cover-letter", "*.html")):
+            with open(path, encoding="utf-8") as f:
+                _hoist_styles(f.read())
+    except Exception as e:
+        # A failed warm-up only costs the first render some time; never kill the worker for it
+        print(f"⚠ PDF worker warm-up failed: {e}")
+
+
+def render_first_page_png(pdf_bytes: bytes, width: int = 800) -> bytes:
+    """Rasterize the first page of a PDF to a PNG `width` pixels wide (PyMuPDF)."""
+    import fitz  # PyMuPDF, only needed for previews
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page = doc[0]
+        zoom = width / page.rect.width
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).tobytes("png")
@@ -0,0 +1,141 @@
+"""
+PDF rendering service backed by a pool of warm WeasyPrint processes.
+
+WeasyPrint is CPU-bound and holds the GIL, so rendering on the request
+thread stalls every other request of the worker. Renders are shipped to
+PDF_RENDER_WORKERS processes instead (spawned, so they don't inherit the
+server's threads and sockets), each warmed up once by pdf_generator.warm_up.
+
+- at most PDF_RENDER_MAX_PENDING renders are queued or running per API
+  worker; callers wait up to PDF_RENDER_QUEUE_TIMEOUT for a slot, then get 503
+- each render gets PDF_RENDER_TIMEOUT seconds, then the caller gets 504 and
+  the pool's processes are killed and replaced: a hung render would otherwise
+  keep its process busy and make every later render time out too
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.utils.pdf_generator import generate_pdf_timed, warm_up
+
+_executor: ProcessPoolExecutor | None = None
+_semaphores: dict[int, asyncio.Semaphore] = {}
+_render_stats: dict[str, dict] = {}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up,
+        )
+    return _executor
+
+
+def _restart(executor: ProcessPoolExecutor, kill: bool = False):
+    """Drop `executor` so the next render starts a fresh pool; `kill` stops its busy processes too."""
+    global _executor
+    if _executor is not executor:
+        return  # another render already replaced it
+    _executor = None
+    if kill:
+        # There is no public way to interrupt a running task: kill the processes (other
+        # renders in flight on this pool fail with BrokenProcessPool and get a 503)
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # One per event loop: a semaphore is bound to the loop it is first used on
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(id(loop))
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.PDF_RENDER_MAX_PENDING)
+        _semaphores[id(loop)] = semaphore
+    return semaphore
+
+
+def _record(label: str, seconds: float, size: int):
+    stats = _render_stats.setdefault(label, {
+        "renders": 0, "total_seconds": 0.0, "max_seconds": 0.0, "total_bytes": 0, "last_bytes": 0,
+    })
+    stats["renders"] += 1
+    stats["total_seconds"] += seconds
+    stats["max_seconds"] = max(stats["max_seconds"], seconds)
+    stats["total_bytes"] += size
+    stats["last_bytes"] = size
+
+
+def get_render_stats() -> dict:
+    """Render time (inside the worker, excluding queueing) and output size per label, for this API worker."""
+    return {
+        label: {
+            "renders": s["renders"],
+            "avg_seconds": round(s["total_seconds"] / s["renders"], 4),
+            "max_seconds": round(s["max_seconds"], 4),
+            "avg_bytes": s["total_bytes"] // s["renders"],
+            "last_bytes": s["last_bytes"],
+        }
+        for label, s in _render_stats.items()
+    }
+
+
+async def render_pdf(html: str, timeout: float | None = None, label: str = "other") -> bytes:
+    """
+    Render HTML to PDF bytes in the process pool.
+    `label` (template id, "cover_letter", ...) groups the render in get_render_stats().
+    """
+    semaphore = _get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=settings.PDF_RENDER_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="PDF renderer is busy, please try again shortly.")
+
+    try:
+        # PDF_RENDER_WORKERS = 0 renders on the default thread pool instead (still off the event loop)
+        executor = _get_executor() if settings.PDF_RENDER_WORKERS > 0 else None
+        future = asyncio.get_running_loop().run_in_executor(executor, generate_pdf_timed, html)
+        try:
+            pdf_bytes, seconds = await asyncio.wait_for(future, timeout=timeout or settings.PDF_RENDER_TIMEOUT)
+            _record(label, seconds, len(pdf_bytes))
+            return pdf_bytes
+        except asyncio.TimeoutError:
+            if executor is not None:
+                print(f"⚠ PDF render ({label}) timed out, restarting the render pool")
+                _restart(executor, kill=True)
+            # (with PDF_RENDER_WORKERS = 0 the thread can't be stopped; it finishes in the background)
+            raise HTTPException(status_code=504, detail="PDF rendering timed out.")
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in a native lib); start a fresh pool for the next render
+            print("⚠ PDF render pool broken, restarting it")
+            _restart(executor)
+            raise HTTPException(status_code=503, detail="PDF renderer restarted, please try again.")
+    finally:
+        semaphore.release()
+
+
+async def start():
+    """Spawn and warm every worker process up front instead of on the first renders."""
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    # Each submit spawns a process (up to max_workers), and its initializer runs before the no-op
+    await asyncio.gather(
+        *(loop.run_in_executor(executor, int) for _ in range(settings.PDF_RENDER_WORKERS)),
+        return_exceptions=True,
+    )
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
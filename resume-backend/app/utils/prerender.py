@@ -0,0 +1,115 @@
+"""
+Speculative pre-rendering after a resume save.
+
+Users usually download right after editing, so once POST /resume commits
+new resume_data we warm the PDF cache for the templates the user is most
+likely to download: the one selected in the editor plus their recent
+downloads (from resume_downloaded activity).
+
+- at most PRERENDER_MAX_TEMPLATES templates per save
+- a newer save by the same user cancels the pending pre-render, and each
+  run waits PRERENDER_DELAY seconds first, so autosave bursts render once
+- a run also stops if resume_data changed in the database meanwhile (the
+  newer save may have landed on another worker)
+- PRERENDER_MAX_CONCURRENT bounds pre-renders per worker so they never
+  crowd out renders users are actually waiting for
+"""
+import asyncio
+import copy
+import hashlib
+import json
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.activity import UserActivity
+from app.models.resume import Resume
+from app.utils import template_registry
+
+_tasks: dict[int, asyncio.Task] = {}
+_semaphores: dict[int, asyncio.Semaphore] = {}
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(id(loop))
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.PRERENDER_MAX_CONCURRENT)
+        _semaphores[id(loop)] = semaphore
+    return semaphore
+
+
+def _fingerprint(resume_data: dict) -> str:
+    return hashlib.sha256(json.dumps(resume_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+async def likely_templates(db: AsyncSession, user_id: int, selected: str | None = None) -> list[str]:
+    """Template ids to pre-render: the selected one, then recently downloaded ones (newest first)."""
+    candidates = [selected] if selected else []
+    recent = await db.scalars(
+        select(UserActivity.meta_data)
+        .where(UserActivity.user_id == user_id, UserActivity.action == "resume_downloaded")
+        .order_by(UserActivity.id.desc())
+        .limit(20)
+    )
+    for meta_data in recent:
+        template_id = ((meta_data or {}).get("fields") or {}).get("template")
+        if template_id:
+            candidates.append(template_id)
+
+    template_ids = []
+    for template_id in candidates:
+        if template_id not in template_ids and template_registry.get_template(template_id):
+            template_ids.append(template_id)
+    return template_ids[:settings.PRERENDER_MAX_TEMPLATES]
+
+
+def _is_current(user_id: int, fingerprint: str) -> bool:
+    db = SessionLocal()
+    try:
+        row = db.query(Resume.resume_data).filter(Resume.user_id == user_id).first()
+        return row is not None and _fingerprint(row.resume_data or {}) == fingerprint
+    finally:
+        db.close()
+
+
+async def _prerender(user_id: int, resume_data: dict, template_ids: list[str]):
+    await asyncio.sleep(settings.PRERENDER_DELAY)
+    fingerprint = _fingerprint(resume_data)
+    for template_id in template_ids:
+        entry = template_registry.get_template(template_id)
+        if entry is None:
+            continue
+        if not await asyncio.to_thread(_is_current, user_id, fingerprint):
+            return
+        async with _get_semaphore():
+            try:
+                await template_registry.render_cached_pdf(entry, user_id, resume_data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠ Pre-render of template {template_id} for user {user_id} failed: {e}")
+
+
+def schedule(user_id: int, resume_data: dict, template_ids: list[str]):
+    """Start pre-rendering, replacing any pre-render still pending for this user."""
+    previous = _tasks.pop(user_id, None)
+    if previous is not None:
+        previous.cancel()
+    if not settings.PRERENDER_ENABLED or not template_ids:
+        return
+
+    # Own copy: the caller may keep editing its dict, which would change the fingerprint
+    task = asyncio.create_task(_prerender(user_id, copy.deepcopy(resume_data), template_ids))
+    _tasks[user_id] = task
+    task.add_done_callback(lambda t: _tasks.pop(user_id, None) if _tasks.get(user_id) is t else None)
+
+
+async def cancel_all():
+    tasks = list(_tasks.values())
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
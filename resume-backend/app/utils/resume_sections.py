@@ -0,0 +1,196 @@
+"""
+Local, layout-aware resume section parser.
+
+Splits an extracted document (see document_extractor) into sections such as
+summary, experience, education and skills, and pulls contact details out
+with regexes, so prompts can send compact sections instead of raw PDF text
+and contact fields never need the LLM.
+
+Headings are lines matching a known section name that also look like a
+heading: larger than the body font, bold, or all caps. For PDFs, short
+lines much larger than the body font are taken as headings too, even with
+an unknown name. Plain text has no layout, so there a known name on a line
+of its own is enough. Lines repeated on most pages (headers, footers) and
+page numbers are dropped, as are repeated sentences within a section.
+"""
+import re
+
+from app.utils.ats_scorer import EMAIL_RE, PHONE_RE, SECTION_HEADINGS
+
+RESUME_SECTIONS = {
+    **SECTION_HEADINGS,
+    "summary": SECTION_HEADINGS["summary"] + ("career objective", "professional profile", "career summary"),
+    "experience": SECTION_HEADINGS["experience"] + ("work experience", "employment history", "internships"),
+    "skills": SECTION_HEADINGS["skills"] + ("key skills", "skills & tools", "technical expertise"),
+    "achievements": ("achievements", "accomplishments", "awards", "honors", "honours", "awards & achievements"),
+    "languages": ("languages", "language proficiency"),
+}
+HEADING_ALIASES = {alias: section for section, aliases in RESUME_SECTIONS.items() for alias in aliases}
+SECTION_ORDER = ("header", "summary", "experience", "projects", "skills", "education", "certifications",
+                 "achievements", "languages")
+
+LINKEDIN_RE = re.compile(r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/[^\s|,;()]+", re.I)
+GIT_RE = re.compile(r"(?:https?://)?(?:www\.)?(?:github|gitlab)\.com/[^\s|,;()]+", re.I)
+URL_RE = re.compile(r"(?:https?://|www\.)[^\s|,;()]+|\b[\w-]+\.(?:dev|io|me|site|page|app|com)/?[^\s|,;()]*", re.I)
+# Outside the header a bare domain is usually an employer ("Engineer at Shopify.com"), not the portfolio
+EXPLICIT_URL_RE = re.compile(r"(?:https?://|www\.)[^\s|,;()]+", re.I)
+LOCATION_RE = re.compile(r"^[A-Z][A-Za-z .'-]+,\s*[A-Z][A-Za-z .'-]+$")
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$", re.I)
+HEADER_SPLIT_RE = re.compile(r"\s*[|•·◦▪]\s*|\s{3,}")
+HEADING_CLEAN_RE = re.compile(r"[^a-z& ]")
+
+DEDUPE_MIN_CHARS = 25
+CONTACT_FIELDS = ("name", "email", "phone", "location", "linkedin_url", "git_url", "portfolio_url")
+
+
+def _heading_key(text: str) -> str | None:
+    cleaned = HEADING_CLEAN_RE.sub("", text.lower()).strip()
+    return HEADING_ALIASES.get(re.sub(r"\s+", " ", cleaned))
+
+
+def _body_font_size(lines: list[list]) -> float | None:
+    """Most common font size, weighted by characters."""
+    weights = {}
+    for _, text, font_size, _ in lines:
+        if font_size:
+            weights[font_size] = weights.get(font_size, 0) + len(text)
+    return max(weights, key=weights.get) if weights else None
+
+
+def _drop_page_noise(lines: list[list], pages: int) -> list[list]:
+    """Drop page numbers and headers/footers repeated on most pages."""
+    if pages >= 2:
+        pages_seen = {}
+        for page, text, _, _ in lines:
+            pages_seen.setdefault(text.lower(), set()).add(page)
+        repeated = {text for text, seen in pages_seen.items() if len(seen) >= max(2, pages // 2 + 1)}
+    else:
+        repeated = set()
+    return [line for line in lines if not PAGE_NUMBER_RE.match(line[1]) and line[1].lower() not in repeated]
+
+
+def _is_heading(line: list, body_size: float | None, seen_heading: bool) -> str | None:
+    """Section key if the line is a heading ("other: <title>" for unknown PDF headings)."""
+    _, text, font_size, bold = line
+    if len(text) > 40 or len(text.split()) > 5:
+        return None
+    key = _heading_key(text)
+    styled = bold or (text.isupper() and any(c.isalpha() for c in text))
+    if font_size and body_size:
+        styled = styled or font_size >= body_size * 1.05
+        if key is None and seen_heading and font_size >= body_size * 1.25 and not any(c.isdigit() for c in text):
+            return f"other: {text.strip(' :').title()}"
+    elif font_size is None and not bold:
+        styled = True  # plain text: a known name on a line of its own
+    return key if key and styled else None
+
+
+def extract_contact(text: str, header_lines: list[str]) -> dict:
+    """
+    Contact fields found in the text; the name and location only come from the header lines,
+    and so does a bare-domain portfolio (elsewhere it needs a scheme or www.).
+    """
+    contact = {}
+    if match := EMAIL_RE.search(text):
+        contact["email"] = match.group(0)
+    if match := PHONE_RE.search(text):
+        contact["phone"] = match.group(0).strip()
+    if match := LINKEDIN_RE.search(text):
+        contact["linkedin_url"] = match.group(0).rstrip(".")
+    if match := GIT_RE.search(text):
+        contact["git_url"] = match.group(0).rstrip(".")
+    header_text = "\n".join(header_lines)
+    for source, pattern in ((header_text, URL_RE), (text, EXPLICIT_URL_RE)):
+        if "portfolio_url" in contact:
+            break
+        for match in pattern.finditer(source):
+            url = match.group(0).rstrip(".")
+            if not LINKEDIN_RE.search(url) and not GIT_RE.search(url) \
+                    and "@" not in source[max(0, match.start() - 1):match.start() + 1]:
+                contact["portfolio_url"] = url
+                break
+
+    for line in header_lines:
+        for segment in HEADER_SPLIT_RE.split(line):
+            if not segment or EMAIL_RE.search(segment) or PHONE_RE.search(segment) or URL_RE.search(segment):
+                continue
+            words = segment.split()
+            if "name" not in contact and 2 <= len(words) <= 4 and all(w[:1].isalpha() for w in words) \
+                    and not any(c.isdigit() for c in segment):
+                contact["name"] = segment.title() if segment.isupper() else segment
+            elif "location" not in contact and LOCATION_RE.match(segment):
+                contact["location"] = segment
+    return contact
+
+
+def _strip_contact(line: str, contact: dict) -> str:
+    for value in contact.values():
+        line = re.sub(re.escape(value), "", line, flags=re.I)
+    return HEADER_SPLIT_RE.sub(" | ", line).strip(" |,-")
+
+
+def parse_sections(document: dict) -> dict:
+    """
+    {"contact": {field: value}, "sections": {key: text}} for an extracted document.
+    Lines before the first heading go to "header" (with the contact details removed).
+    """
+    lines = _drop_page_noise(document.get("lines") or [], document.get("pages") or 1)
+    body_size = _body_font_size(lines)
+
+    collected = {"header": []}
+    current = "header"
+    seen = {"header": set()}
+    for line in lines:
+        key = _is_heading(line, body_size, current != "header")
+        if key:
+            current = key
+            collected.setdefault(current, [])
+            seen.setdefault(current, set())
+            continue
+        text = line[1]
+        # Only longer lines are deduplicated: short ones are dates and places that legitimately repeat
+        if len(text) < DEDUPE_MIN_CHARS or text.lower() not in seen[current]:
+            seen[current].add(text.lower())
+            collected[current].append(text)
+
+    contact = extract_contact(document.get("text", ""), collected["header"][:8])
+    header = [_strip_contact(line, contact) for line in collected["header"]]
+    collected["header"] = [line for line in header if line]
+
+    return {
+        "contact": contact,
+        "sections": {key: "\n".join(value) for key, value in collected.items() if value},
+    }
+
+
+def has_sections(parsed: dict) -> bool:
+    """True when at least one known section (besides the header) was found."""
+    return any(key in RESUME_SECTIONS for key in parsed["sections"])
+
+
+def compact_resume_text(parsed: dict, max_chars: int | None = None) -> str:
+    """
+    Sections in a fixed order as "## TITLE" blocks, without contact details.
+    With max_chars, the section that doesn't fit is cut at a line break and the rest dropped.
+    """
+    sections = parsed["sections"]
+    keys = [k for k in SECTION_ORDER if k in sections] + [k for k in sections if k not in SECTION_ORDER]
+    blocks, used = [], 0
+    for key in keys:
+        block = f"## {key.upper()}\n{sections[key]}"
+        if max_chars is not None and used + len(block) > max_chars:
+            cut = block.rfind("\n", 0, max_chars - used)
+            if cut > len(key) + 4:  # keep a cut section only if some of its body fits
+                blocks.append(block[:cut])
+            break
+        blocks.append(block)
+        used += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def fill_contact(resume_data: dict, contact: dict) -> dict:
+    """Overwrite the contact fields of a resume_data dict with the locally parsed ones."""
+    for field in CONTACT_FIELDS:
+        if contact.get(field):
+            resume_data[field] = contact[field]
+    return resume_data
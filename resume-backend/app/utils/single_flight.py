@@ -0,0 +1,53 @@
+import asyncio
+import hashlib
+
+
+def make_flight_key(user_id, *parts) -> str:
+    """Key a call on the user plus a hash of whatever identifies the work (usually the prompt)."""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"{user_id}:{digest}"
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls inside one worker process.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still in flight wait on its future and get the same result (or exception)
+    instead of running the work a second time. If the leader is cancelled
+    (client gone), its followers run the call again, one of them as the new leader.
+    """
+
+    def __init__(self):
+        self._async_calls: dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, fn, *args, **kwargs):
+        existing = self._async_calls.get(key)
+        if existing is not None:
+            try:
+                # shield: a follower disconnecting must not cancel the leader's call
+                return await asyncio.shield(existing)
+            except asyncio.CancelledError:
+                if not existing.cancelled():
+                    raise  # this follower itself was cancelled
+            return await self.run(key, fn, *args, **kwargs)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[key] = future
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved so an unawaited future doesn't log a warning
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._async_calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._async_calls)
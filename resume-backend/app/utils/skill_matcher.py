@@ -0,0 +1,102 @@
+"""
+Local job-description ↔ resume skill matching.
+
+Both sides are projected onto the skill taxonomy as weighted TF vectors
+(log-scaled term counts × taxonomy weight), so matching is a couple of NumPy
+operations instead of an LLM call.
+"""
+import re
+
+import numpy as np
+
+from app.utils.skill_taxonomy import (
+    CANONICAL_SKILLS,
+    SKILL_INDEX,
+    SKILL_WEIGHTS,
+    find_skill_mentions,
+    normalize_skill,
+)
+
+_WEIGHTS = np.asarray(SKILL_WEIGHTS, dtype=np.float64)
+_VOCAB_SIZE = len(CANONICAL_SKILLS)
+
+
+def resume_skill_names(resume_data: dict) -> list[str]:
+    """Skills the user listed explicitly (skills section + keywords), as typed."""
+    names = []
+    for item in resume_data.get("skills") or []:
+        name = item.get("skill") if isinstance(item, dict) else item
+        if name:
+            names.append(str(name))
+    names.extend(str(k) for k in resume_data.get("keywords") or [] if k)
+    return names
+
+
+def resume_free_text(resume_data: dict) -> str:
+    """Free text of the resume that may mention skills (summary, roles, projects, ...)."""
+    parts = [resume_data.get("jobrole") or "", resume_data.get("summary") or ""]
+    for key, fields in (
+        ("experiences", ("title", "description")),
+        ("projects", ("name", "description")),
+        ("certifications", ("name",)),
+        ("achievements", ("title", "description")),
+    ):
+        for item in resume_data.get(key) or []:
+            if isinstance(item, dict):
+                parts.extend(str(item.get(f) or "") for f in fields)
+    return "\n".join(parts)
+
+
+def _skill_vector(skills: list[str]) -> np.ndarray:
+    """Weighted TF vector over the taxonomy; skills outside it are ignored."""
+    indices = np.fromiter((SKILL_INDEX[s] for s in skills if s in SKILL_INDEX), dtype=np.intp)
+    counts = np.bincount(indices, minlength=_VOCAB_SIZE)
+    return np.log1p(counts) * _WEIGHTS
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    denom = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(a @ b / denom) if denom else 0.0
+
+
+def match_skills(jd_text: str, resume_data: dict) -> dict:
+    """
+    Compare a job description with the stored resume JSON.
+    Returns matched/missing skills, required_skills_match (weighted coverage
+    of the JD's skills, 0-100) and skill_similarity (cosine, 0-100).
+    """
+    resume_data = resume_data or {}
+    jd_lower = (jd_text or "").lower()
+
+    declared = {normalize_skill(s) for s in resume_skill_names(resume_data)}
+    declared.discard("")
+    resume_mentions = list(declared) + find_skill_mentions(resume_free_text(resume_data))
+
+    jd_vec = _skill_vector(find_skill_mentions(jd_lower))
+    resume_vec = _skill_vector(resume_mentions)
+
+    required = jd_vec > 0
+    matched_mask = required & (resume_vec > 0)
+    missing_mask = required & ~matched_mask
+
+    # Listed skills the taxonomy doesn't know: count them if the JD names them verbatim
+    extra = sorted(
+        s for s in declared
+        if s not in SKILL_INDEX and len(s) > 2
+        and re.search(rf"(?<![\w]){re.escape(s)}(?![\w])", jd_lower)
+    )
+
+    required_weight = _WEIGHTS[required].sum() + len(extra)
+    matched_weight = _WEIGHTS[matched_mask].sum() + len(extra)
+    coverage = matched_weight / required_weight if required_weight else 0.0
+
+    # Missing skills, most emphasised in the JD first
+    missing_idx = np.flatnonzero(missing_mask)
+    missing_idx = missing_idx[np.argsort(-jd_vec[missing_idx], kind="stable")]
+
+    return {
+        "matched_skills": [CANONICAL_SKILLS[i] for i in np.flatnonzero(matched_mask)] + extra,
+        "missing_skills": [CANONICAL_SKILLS[i] for i in missing_idx],
+        "required_skills_match": int(round(coverage * 100)),
+        "skill_similarity": int(round(_cosine(jd_vec, resume_vec) * 100)),
+    }
@@ -0,0 +1,163 @@
+"""
+Skill taxonomy: canonical skill names, their synonyms and a relative weight.
+
+Weights act as a fixed IDF: generic / soft skills count for less than
+specific technologies when scoring a match.
+"""
+import re
+
+# canonical name -> (synonyms, weight)
+SKILLS = {
+    # Languages
+    "python": ((), 1.0),
+    "java": ((), 1.0),
+    "javascript": (("js", "ecmascript", "es6"), 1.0),
+    "typescript": (("ts",), 1.0),
+    "c++": (("cpp",), 1.0),
+    "c#": (("csharp", "c sharp"), 1.0),
+    "go": (("golang",), 1.0),
+    "rust": ((), 1.0),
+    "kotlin": ((), 1.0),
+    "swift": ((), 1.0),
+    "php": ((), 1.0),
+    "ruby": ((), 1.0),
+    "scala": ((), 1.0),
+    "r": (("r language", "rstudio"), 0.8),
+    "sql": (("structured query language",), 0.9),
+    "bash": (("shell scripting", "shell script"), 0.7),
+    "html": (("html5",), 0.6),
+    "css": (("css3",), 0.6),
+    # Frontend
+    "react": (("react.js", "reactjs"), 1.0),
+    "react native": ((), 1.0),
+    "angular": (("angularjs", "angular.js"), 1.0),
+    "vue": (("vue.js", "vuejs"), 1.0),
+    "next.js": (("nextjs",), 1.0),
+    "redux": ((), 0.8),
+    "tailwind": (("tailwind css", "tailwindcss"), 0.7),
+    "bootstrap": ((), 0.6),
+    "jquery": ((), 0.6),
+    # Backend
+    "node.js": (("node", "nodejs"), 1.0),
+    "express": (("express.js", "expressjs"), 0.9),
+    "django": ((), 1.0),
+    "flask": ((), 1.0),
+    "fastapi": ((), 1.0),
+    "spring": (("spring boot", "springboot"), 1.0),
+    ".net": (("dotnet", "asp.net", ".net core"), 1.0),
+    "laravel": ((), 1.0),
+    "rails": (("ruby on rails", "ror"), 1.0),
+    "graphql": ((), 0.9),
+    "rest": (("rest api", "restful", "restful api", "rest apis"), 0.7),
+    "microservices": (("microservice",), 0.8),
+    "grpc": ((), 0.9),
+    # Data stores
+    "mysql": ((), 0.9),
+    "postgresql": (("postgres", "psql"), 0.9),
+    "mongodb": (("mongo",), 0.9),
+    "redis": ((), 0.9),
+    "elasticsearch": (("elastic search", "elk"), 0.9),
+    "oracle": (("oracle db",), 0.8),
+    "sql server": (("mssql", "ms sql"), 0.8),
+    "sqlite": ((), 0.6),
+    "dynamodb": ((), 0.9),
+    "cassandra": ((), 0.9),
+    "kafka": (("apache kafka",), 1.0),
+    "rabbitmq": ((), 0.9),
+    # Cloud / DevOps
+    "aws": (("amazon web services",), 1.0),
+    "azure": (("microsoft azure",), 1.0),
+    "gcp": (("google cloud", "google cloud platform"), 1.0),
+    "docker": ((), 0.9),
+    "kubernetes": (("k8s",), 1.0),
+    "terraform": ((), 1.0),
+    "ansible": ((), 0.9),
+    "jenkins": ((), 0.8),
+    "ci/cd": (("cicd", "continuous integration", "continuous delivery", "continuous deployment"), 0.8),
+    "github actions": ((), 0.8),
+    "git": (("github", "gitlab", "bitbucket"), 0.5),
+    "linux": (("unix",), 0.6),
+    "nginx": ((), 0.7),
+    # Data / ML
+    "machine learning": (("ml",), 1.0),
+    "deep learning": (("dl",), 1.0),
+    "nlp": (("natural language processing",), 1.0),
+    "computer vision": (("cv", "opencv"), 1.0),
+    "llm": (("large language models", "large language model", "generative ai", "genai"), 1.0),
+    "tensorflow": ((), 1.0),
+    "pytorch": ((), 1.0),
+    "scikit-learn": (("sklearn", "scikit learn"), 0.9),
+    "pandas": ((), 0.8),
+    "numpy": ((), 0.7),
+    "spark": (("apache spark", "pyspark"), 1.0),
+    "hadoop": ((), 0.9),
+    "airflow": (("apache airflow",), 0.9),
+    "data analysis": (("data analytics",), 0.7),
+    "statistics": ((), 0.7),
+    "tableau": ((), 0.9),
+    "power bi": (("powerbi",), 0.9),
+    "excel": (("ms excel", "microsoft excel"), 0.5),
+    "etl": ((), 0.8),
+    # Mobile
+    "android": ((), 1.0),
+    "ios": ((), 1.0),
+    "flutter": ((), 1.0),
+    # Testing / QA
+    "selenium": ((), 0.9),
+    "cypress": ((), 0.9),
+    "jest": ((), 0.8),
+    "pytest": ((), 0.8),
+    "unit testing": (("unit tests",), 0.6),
+    "test automation": (("automation testing",), 0.8),
+    # Design / product
+    "figma": ((), 0.9),
+    "ui/ux": (("ux", "ui design", "user experience"), 0.8),
+    "seo": (("search engine optimization",), 0.9),
+    "salesforce": ((), 1.0),
+    "sap": ((), 1.0),
+    "jira": ((), 0.5),
+    # Practices / soft skills
+    "agile": ((), 0.5),
+    "scrum": ((), 0.5),
+    "project management": ((), 0.6),
+    "communication": (("communication skills",), 0.3),
+    "leadership": (("team leadership",), 0.4),
+    "problem solving": (("problem-solving",), 0.3),
+    "teamwork": (("collaboration",), 0.3),
+    "stakeholder management": ((), 0.5),
+    "system design": ((), 0.9),
+    "data structures": (("algorithms",), 0.8),
+    "oop": (("object oriented programming", "object-oriented programming"), 0.6),
+    "security": (("cybersecurity", "cyber security", "infosec"), 0.8),
+}
+
+CANONICAL_SKILLS = list(SKILLS)
+SKILL_INDEX = {name: i for i, name in enumerate(CANONICAL_SKILLS)}
+SKILL_WEIGHTS = [weight for _, weight in SKILLS.values()]
+
+# alias (lowercase) -> canonical name
+ALIASES = {}
+for _name, (_synonyms, _weight) in SKILLS.items():
+    ALIASES[_name] = _name
+    for _synonym in _synonyms:
+        ALIASES[_synonym] = _name
+
+# Single alternation over every alias, longest first, so text is scanned once.
+# Short ambiguous aliases ("r", "go", "ts", "cv", ...) are only matched in
+# skill lists via normalize_skill(), not in free text.
+_AMBIGUOUS = {"r", "go", "ts", "cv", "dl", "rest", "swift", "spring", "express"}
+TEXT_ALIASES = sorted((a for a in ALIASES if a not in _AMBIGUOUS), key=len, reverse=True)
+SKILL_PATTERN = re.compile(r"(?<![\w])(?:" + "|".join(re.escape(a) for a in TEXT_ALIASES) + r")(?![\w])")
+
+_CLEAN_RE = re.compile(r"[\s]+")
+
+
+def normalize_skill(name: str) -> str:
+    """Map a skill name (as a user typed it) to its canonical form; unknown skills are just cleaned."""
+    cleaned = _CLEAN_RE.sub(" ", (name or "").strip().lower()).strip(" .,;:")
+    return ALIASES.get(cleaned, cleaned)
+
+
+def find_skill_mentions(text: str) -> list[str]:
+    """Canonical skill for every taxonomy alias mention in free text (with repeats, in order)."""
+    return [ALIASES[m] for m in SKILL_PATTERN.findall((text or "").lower())]
@@ -0,0 +1,82 @@
+import json
+
+
+def sse_event(data, event: str | None = None) -> str:
+    """Format one server-sent event with a JSON payload."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop nginx from buffering the stream
+}
+
+
+class JsonSectionStreamer:
+    """
+    Incrementally scans a streamed JSON object and returns each top-level
+    member as soon as its value is complete.
+
+    Anything before the first "{" (e.g. a ```json fence) and after the closing
+    "}" is ignored.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.done = False
+        self._member = []
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        sections = []
+        for ch in chunk:
+            if self.done:
+                break
+
+            if self.depth == 0:
+                if ch == "{":
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                self._member.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    # closing brace of the top-level object
+                    sections.extend(self._flush())
+                    self.done = True
+                    continue
+            elif ch == "," and self.depth == 1:
+                sections.extend(self._flush())
+                continue
+
+            self._member.append(ch)
+        return sections
+
+    def _flush(self) -> list[tuple[str, object]]:
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except ValueError:
+            return []
@@ -0,0 +1,161 @@
+"""
+Resume template registry, loaded once at startup.
+
+Discovers app/templates/resumes/resume_template_*.html, compiles each one
+into the shared Jinja environment and keeps its metadata, so listing,
+preview and download never touch the filesystem per request.
+
+The same environment (with a bytecode cache, so compiled templates survive
+restarts and are shared by all workers) renders the cover letter and any
+other app template.
+"""
+import asyncio
+import glob
+import json
+import os
+import re
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.core.config import settings
+from app.utils import pdf_cache
+from app.utils.pdf_generator import render_first_page_png
+from app.utils.pdf_pool import render_pdf
+
+TEMPLATES_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "../templates"))
+RESUME_TEMPLATES_DIR = os.path.join(TEMPLATES_ROOT, "resumes")
+RESUME_TEMPLATE_RE = re.compile(r"^resume_template_(\w+)\.html$")
+SAMPLE_RESUME_PATH = os.path.join(RESUME_TEMPLATES_DIR, "sample_resume.json")
+
+# id -> tier / category, in display order. Templates found
+# on disk but missing here are listed after these as premium / classical.
+TEMPLATE_METADATA = {
+    "one": {"tier": "free", "category": "modern"},
+    "two": {"tier": "free", "category": "modern"},
+    "three": {"tier": "free", "category": "modern"},
+    **{
+        template_id: {"tier": "premium", "category": "classical"}
+        for template_id in (
+            "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve", "thirteen",
+            "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen", "twenty",
+        )
+    },
+}
+DEFAULT_METADATA = {"tier": "premium", "category": "classical"}
+
+os.makedirs(settings.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+jinja_env = Environment(
+    loader=FileSystemLoader(TEMPLATES_ROOT),
+    bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR),
+    auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+    cache_size=-1,  # never evict a compiled template
+)
+
+# id -> {"id", "name", "thumbnail", "tier", "category", "template", "version", "template_name", "path"}
+_templates: dict[str, dict] = {}
+_thumbnails: dict[str, bytes] = {}
+
+
+def _file_version(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}{stat.st_size:x}"
+
+
+def load():
+    """Discover and compile every resume template. Safe to call again to pick up changes."""
+    found = {}
+    for path in glob.glob(os.path.join(RESUME_TEMPLATES_DIR, "resume_template_*.html")):
+        match = RESUME_TEMPLATE_RE.match(os.path.basename(path))
+        if match:
+            found[match.group(1)] = path
+
+    ordered = [t for t in TEMPLATE_METADATA if t in found] + sorted(t for t in found if t not in TEMPLATE_METADATA)
+    templates = {}
+    for template_id in ordered:
+        path = found[template_id]
+        metadata = TEMPLATE_METADATA.get(template_id, DEFAULT_METADATA)
+        template_name = f"resumes/{os.path.basename(path)}"
+        templates[template_id] = {
+            "id": template_id,
+            "name": f"Resume template {template_id}",
+            # Known templates have hand-made thumbnails in the frontend; new ones use the generated PNG
+            "thumbnail": f"/static/resume_thumbs/{template_id}.png" if template_id in TEMPLATE_METADATA
+                         else f"/api/v1/resume/templates/{template_id}/thumbnail",
+            "tier": metadata["tier"],
+            "category": metadata["category"],
+            "template": jinja_env.get_template(template_name),
+            "version": _file_version(path),
+            "template_name": template_name,
+            "path": path,
+        }
+
+    _templates.clear()
+    _templates.update(templates)
+    print(f"✅ Loaded {len(_templates)} resume templates")
+
+
+def get_template(template_id: str) -> dict | None:
+    if not _templates:
+        load()
+    entry = _templates.get(template_id)
+    if entry is not None and settings.TEMPLATE_AUTO_RELOAD:
+        # Re-fetch so an edited file is picked up (Jinja re-checks it), with a version that busts the PDF cache
+        return {**entry, "template": jinja_env.get_template(entry["template_name"]), "version": _file_version(entry["path"])}
+    return entry
+
+
+def list_templates() -> list[dict]:
+    """Public listing fields, in display order."""
+    if not _templates:
+        load()
+    return [
+        {key: entry[key] for key in ("id", "name", "thumbnail", "tier", "category")}
+        for entry in _templates.values()
+    ]
+
+
+async def render_cached_pdf(entry: dict, user_id: int, resume_data: dict) -> bytes:
+    """Render resume_data with a registry entry, serving repeat renders from the PDF cache."""
+    cache_key = pdf_cache.make_key(user_id, entry["id"], entry["version"], resume_data)
+    pdf_bytes = await pdf_cache.lookup_async(cache_key)
+    if pdf_bytes is None:
+        pdf_bytes = await render_pdf(entry["template"].render(resume=resume_data), label=entry["id"])
+        await pdf_cache.store_async(cache_key, pdf_bytes)
+    return pdf_bytes
+
+
+def get_thumbnail(template_id: str) -> bytes | None:
+    return _thumbnails.get(template_id)
+
+
+def _thumbnail_path(entry: dict) -> str:
+    return os.path.join(settings.TEMPLATE_THUMBNAIL_DIR, f"{entry['id']}-{entry['version']}.png")
+
+
+async def generate_thumbnails():
+    """
+    Render every template with the sample resume and keep a first-page PNG.
+    PNGs are kept on disk per template version, so restarts only render
+    templates that changed. Meant to run in the background after startup.
+    """
+    with open(SAMPLE_RESUME_PATH, encoding="utf-8") as f:
+        sample = json.load(f)
+    os.makedirs(settings.TEMPLATE_THUMBNAIL_DIR, exist_ok=True)
+
+    for entry in list(_templates.values()):
+        path = _thumbnail_path(entry)
+        try:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    _thumbnails[entry["id"]] = f.read()
+                continue
+            pdf_bytes = await render_pdf(entry["template"].render(resume=sample), label=entry["id"])
+            png = await asyncio.to_thread(render_first_page_png, pdf_bytes, settings.TEMPLATE_THUMBNAIL_WIDTH)
+            # Every API worker does this at startup: write aside and rename, so none reads a partial PNG
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+            _thumbnails[entry["id"]] = png
+        except Exception as e:
+            print(f"⚠ Thumbnail for template {entry['id']} failed: {e}")
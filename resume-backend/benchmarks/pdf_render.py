@@ -0,0 +1,208 @@
+"""
+PDF rendering benchmark: every resume template (and the cover letter) against
+resume_data fixtures from small to very large.
+
+Runs offline: no database, no Gemini, no app settings. Each measurement runs
+in a fresh process so peak RSS belongs to that render alone.
+
+    cd resume-backend
+    python -m benchmarks.pdf_render                          # full run
+    python -m benchmarks.pdf_render --templates one,seven --sizes 2,40
+    python -m benchmarks.pdf_render --baseline old.json      # print changes vs an earlier report
+
+Each case also renders the document once as-is (template <style> blocks left
+inline, author origin) and compares the rasterized pages with the production
+render ("matches_inline_styles"), which hoists those blocks into cached
+stylesheets.
+
+The JSON report is written with stable ordering so two reports diff cleanly.
+"""
+import argparse
+import copy
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATES_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "../app/templates"))
+SAMPLE_RESUME_PATH = os.path.join(TEMPLATES_ROOT, "resumes", "sample_resume.json")
+DEFAULT_SIZES = (2, 5, 10, 20, 40)
+COVER_LETTER = "cover_letter"
+
+env = Environment(loader=FileSystemLoader(TEMPLATES_ROOT))
+
+
+def template_ids() -> list[str]:
+    paths = glob.glob(os.path.join(TEMPLATES_ROOT, "resumes", "resume_template_*.html"))
+    return sorted(os.path.basename(p)[len("resume_template_"):-len(".html")] for p in paths)
+
+
+def make_resume(experiences: int) -> dict:
+    """The sample resume grown to `experiences` jobs, with projects and skills scaled alongside."""
+    with open(SAMPLE_RESUME_PATH, encoding="utf-8") as f:
+        base = json.load(f)
+    resume = copy.deepcopy(base)
+
+    def grow(key: str, count: int):
+        items = base[key]
+        resume[key] = []
+        for i in range(count):
+            item = dict(items[i % len(items)])
+            for field in ("title", "name", "company", "skill"):
+                if field in item and i >= len(items):
+                    item[field] = f"{item[field]} {i + 1}"
+            resume[key].append(item)
+
+    grow("experiences", experiences)
+    grow("projects", max(1, experiences // 2))
+    grow("skills", max(len(base["skills"]), experiences))
+    grow("achievements", max(1, experiences // 4))
+    return resume
+
+
+def render_html(template: str, experiences: int) -> str:
+    if template == COVER_LETTER:
+        paragraph = make_resume(experiences)["summary"]
+        return env.get_template("cover-letter/cover_letter_template.html").render(
+            jobRole="Senior Software Engineer",
+            companyName="Northwind Labs",
+            tone="professional",
+            cover_letter="\n\n".join([paragraph] * max(1, experiences // 2)),
+            candidate_name="Alex Morgan",
+        )
+    return env.get_template(f"resumes/resume_template_{template}.html").render(resume=make_resume(experiences))
+
+
+def _page_digest(pdf_bytes: bytes) -> str:
+    """Hash of the rasterized pages: PDF bytes differ between identical renders (ids, dates)."""
+    import fitz  # PyMuPDF
+
+    digest = hashlib.sha256()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page in doc:
+            digest.update(page.get_pixmap(alpha=False).samples)
+    return digest.hexdigest()
+
+
+def _measure(template: str, experiences: int, repeat: int) -> dict:
+    """Runs in a fresh worker process."""
+    import fitz  # PyMuPDF
+    from weasyprint import HTML
+    from app.utils.pdf_generator import PDF_OPTIONS, generate_pdf_from_html, warm_up
+
+    warm_up()  # production workers are warm, so font loading is not part of the number
+    html = render_html(template, experiences)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pdf_bytes = generate_pdf_from_html(html)
+        timings.append(time.perf_counter() - started)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = doc.page_count
+    inline_pdf = HTML(string=html).write_pdf(**PDF_OPTIONS)
+
+    return {
+        "template": template,
+        "experiences": experiences,
+        "wall_seconds": round(statistics.median(timings), 4),
+        "wall_seconds_min": round(min(timings), 4),
+        "peak_rss_kb": peak_rss,  # kilobytes on Linux
+        "rss_growth_kb": peak_rss - baseline_rss,
+        "pages": pages,
+        "pdf_bytes": len(pdf_bytes),
+        "matches_inline_styles": _page_digest(pdf_bytes) == _page_digest(inline_pdf),
+    }
+
+
+def run(templates: list[str], sizes: list[int], repeat: int, jobs: int) -> list[dict]:
+    cases = [(t, n) for t in templates for n in sizes]
+    results = []
+    # max_tasks_per_child=1: one process per case, so ru_maxrss is that case's peak
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"),
+                             max_tasks_per_child=1) as pool:
+        futures = {pool.submit(_measure, t, n, repeat): (t, n) for t, n in cases}
+        for future in futures:
+            t, n = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"template": t, "experiences": n, "error": str(e)}
+            results.append(result)
+            print(f"{t:>10} {n:>3} exp  " + (
+                f"{result['wall_seconds']:.3f}s  {result['pages']}p  {result['pdf_bytes'] / 1024:.0f} KiB  "
+                f"{result['peak_rss_kb'] / 1024:.0f} MiB"
+                + ("" if result["matches_inline_styles"] else "  OUTPUT DIFFERS FROM INLINE STYLES")
+                if "error" not in result else f"ERROR {result['error']}"
+            ), flush=True)
+    return results
+
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["template"], r["experiences"]): r for r in json.load(f)["results"] if "error" not in r}
+
+    print(f"\nChanges vs {baseline_path}:")
+    for r in results:
+        old = baseline.get((r["template"], r["experiences"]))
+        if not old or "error" in r:
+            continue
+        deltas = []
+        for key in ("wall_seconds", "pdf_bytes", "peak_rss_kb", "pages"):
+            if old[key]:
+                deltas.append(f"{key} {100 * (r[key] - old[key]) / old[key]:+.1f}%")
+        print(f"{r['template']:>10} {r['experiences']:>3} exp  " + "  ".join(deltas))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--templates", help="comma-separated template ids (default: all, plus cover_letter)")
+    parser.add_argument("--sizes", help="comma-separated experience counts", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--repeat", type=int, default=3, help="renders per case; the median is reported")
+    parser.add_argument("--jobs", type=int, default=1, help="cases measured in parallel (skews wall time if > 1)")
+    parser.add_argument("--output", default="pdf_render_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    templates = args.templates.split(",") if args.templates else template_ids() + [COVER_LETTER]
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    import weasyprint
+
+    results = run(templates, sizes, args.repeat, args.jobs)
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "weasyprint": weasyprint.__version__,
+        },
+        "repeat": args.repeat,
+        "results": sorted(results, key=lambda r: (r["template"], r["experiences"])),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        compare(report["results"], args.baseline)
+    return 0 if all("error" not in r and r["matches_inline_styles"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())